@@ -0,0 +1,49 @@
+# run_benchmarks.py - STAGE TIMING HISTORY AND REGRESSION CHECK
+import sys
+import argparse
+from src.benchmarks import (
+    HISTORY_DB, SIGNIFICANCE, MIN_CHANGE, code_version, list_versions, compare_versions, print_comparison
+)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="List recorded code versions or compare stage timings and memory between two of them"
+    )
+    parser.add_argument("--db", default=HISTORY_DB, help=f"History store (default {HISTORY_DB})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Code versions with recorded runs")
+    compare = commands.add_parser("compare", help="Flag significant slowdowns and memory growth")
+    compare.add_argument("baseline", nargs="?", help="Baseline code version (default: second newest)")
+    compare.add_argument("candidate", nargs="?", help="Candidate code version (default: newest)")
+    compare.add_argument("--phase", help="Only runs of this phase (e.g. dm3_prod)")
+    compare.add_argument("--alpha", type=float, default=SIGNIFICANCE, help="Significance level")
+    compare.add_argument("--min-change", type=float, default=MIN_CHANGE,
+                         help="Smallest relative change flagged (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    versions = list_versions(args.db)
+    if args.command == "list":
+        if not versions:
+            print(f"No benchmark runs recorded in {args.db}")
+        for version, first_seen, runs in versions:
+            current = "  (current code)" if version == code_version() else ""
+            print(f"{version:<20} first run {first_seen}  {runs} stage runs{current}")
+        return
+
+    names = [version for version, _, _ in versions]
+    candidate = args.candidate or (names[-1] if names else None)
+    baseline = args.baseline or next((v for v in reversed(names) if v != candidate), None)
+    if not baseline or not candidate:
+        print("Need runs from two code versions to compare (see 'list')")
+        sys.exit(1)
+    for version in (baseline, candidate):
+        if version not in names:
+            print(f"Unknown code version: {version} (see 'list')")
+            sys.exit(1)
+
+    results = compare_versions(baseline, candidate, args.phase, args.db, args.alpha, args.min_change)
+    regressions = print_comparison(baseline, candidate, results, args.alpha, args.min_change)
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import sys
 from src.orchestration import execute_dm3_phase
 
-def main():
+def confirm_production():
+    """Double confirmation before touching PRODUCTION (exits if declined)"""
     print("="*70)
     print("YARDI PRODUCTION MIGRATION - DM3 GO-LIVE")
     print("="*70)
@@ -24,6 +25,9 @@ def main():
     if final_confirmation != "CONFIRM":
         print("\nProduction migration cancelled!")
         sys.exit(0)
+
+def main():
+    confirm_production()
     
     # Execute migration
     execute_dm3_phase()
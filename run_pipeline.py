@@ -0,0 +1,38 @@
+# run_pipeline.py - COMBINED REHEARSAL RUN (several phases in one process)
+import sys
+import argparse
+from src.config_validator import validate_config
+from src.orchestration import PHASE_RUNNERS, execute_phase_sequence
+
+PHASE_ORDER = ["dm1_crp", "dm2_uat", "dm3_prod"]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run migration phases back to back, reusing parsed sources as delta references"
+    )
+    parser.add_argument(
+        "phases", nargs="*", default=PHASE_ORDER,
+        help="Phases to run in order (default: dm1_crp dm2_uat dm3_prod)"
+    )
+    args = parser.parse_args()
+    unknown = [phase for phase in args.phases if phase not in PHASE_RUNNERS]
+    if unknown:
+        parser.error(f"unknown phase(s): {', '.join(unknown)}")
+    
+    # Validate every config up front so a late phase cannot fail on config
+    for phase in args.phases:
+        valid, msg = validate_config(f"config/{phase}.yaml")
+        if not valid:
+            print(f"FATAL: Invalid configuration for {phase} - {msg}")
+            sys.exit(1)
+    
+    if "dm3_prod" in args.phases:
+        from run_dm3 import confirm_production
+        confirm_production()
+    
+    print(f"Starting combined run: {' -> '.join(args.phases)}")
+    execute_phase_sequence(args.phases)
+    print("Combined run completed! Check reports for results")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# run_preflight.py - GO/NO-GO CHECK (headers, row counts and disk space only)
+import sys
+import time
+from src.status import PHASE_CONFIGS
+from src.orchestration import load_config
+from src.preflight import run_preflight
+
+if __name__ == "__main__":
+    phases = sys.argv[1:] or list(PHASE_CONFIGS)
+    unknown = [phase for phase in phases if phase not in PHASE_CONFIGS]
+    if unknown:
+        print(f"Unknown phase(s): {', '.join(unknown)}. Choose from {', '.join(PHASE_CONFIGS)}")
+        sys.exit(1)
+
+    started = time.time()
+    results = []
+    for phase in phases:
+        results.append(run_preflight(load_config(PHASE_CONFIGS[phase])))
+
+    print(f"\n{'GO' if all(results) else 'NO-GO'} ({time.time() - started:.1f}s)")
+    sys.exit(0 if all(results) else 1)
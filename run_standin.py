@@ -0,0 +1,20 @@
+# run_standin.py - LOCAL STAND-IN for the Yardi import endpoint (testing only)
+import argparse
+from src.standin_service import STANDIN_DB, serve_standin
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a SQLite-backed stand-in for the Yardi import endpoint"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--db", default=STANDIN_DB, help=f"SQLite file (default {STANDIN_DB})")
+    parser.add_argument("--failure-rate", type=float, default=0.0,
+                        help="Share of requests answered with 503, to exercise retries")
+    parser.add_argument("--latency-ms", type=int, default=0, help="Added delay per request")
+    args = parser.parse_args()
+
+    serve_standin(args.host, args.port, args.db, args.failure_rate, args.latency_ms)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+# run_status.py - PLAN/STATUS CHECK (no data is read or processed)
+import sys
+from src.status import PHASE_CONFIGS, print_status
+
+if __name__ == "__main__":
+    phases = sys.argv[1:] or list(PHASE_CONFIGS)
+    unknown = [phase for phase in phases if phase not in PHASE_CONFIGS]
+    if unknown:
+        print(f"Unknown phase(s): {', '.join(unknown)}. Choose from {', '.join(PHASE_CONFIGS)}")
+        sys.exit(1)
+
+    print_status(phases)
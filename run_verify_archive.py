@@ -0,0 +1,29 @@
+# run_verify_archive.py - RE-CHECK PRODUCTION ARCHIVES AGAINST THEIR MANIFESTS
+import os
+import sys
+from src.archive import ARCHIVE_ROOT, verify_archive
+
+if __name__ == "__main__":
+    archives = sys.argv[1:]
+    if not archives and os.path.isdir(ARCHIVE_ROOT):
+        archives = sorted(
+            os.path.join(ARCHIVE_ROOT, name) for name in os.listdir(ARCHIVE_ROOT)
+            if os.path.exists(os.path.join(ARCHIVE_ROOT, name, "manifest.json"))
+        )
+    if not archives:
+        print(f"No archives found in {ARCHIVE_ROOT}")
+        sys.exit(1)
+
+    failed = 0
+    for archive_path in archives:
+        problems = verify_archive(archive_path)
+        if problems:
+            failed += 1
+            print(f"❌ {archive_path}")
+            for problem in problems:
+                print(f"    {problem}")
+        else:
+            print(f"✅ {archive_path}")
+
+    print(f"\n{len(archives) - failed}/{len(archives)} archives verified")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,25 @@
+# run_watch.py - CONTINUOUS SYNC (re-runs a module when its source file changes)
+import sys
+import argparse
+from src.config_validator import validate_config
+from src.watch import MODULE_RUNNERS, watch_phase
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Watch a phase's source folder and process modules as their files change"
+    )
+    parser.add_argument("phase", nargs="?", default="dm2_uat", choices=sorted(MODULE_RUNNERS))
+    parser.add_argument("--interval", type=float, help="Seconds between polls (default from config)")
+    parser.add_argument("--settle", type=float,
+                        help="Seconds a file must stay unchanged before processing (default from config)")
+    args = parser.parse_args()
+
+    valid, msg = validate_config(f"config/{args.phase}.yaml")
+    if not valid:
+        print(f"FATAL: Invalid configuration - {msg}")
+        sys.exit(1)
+
+    watch_phase(args.phase, args.interval, args.settle)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from datetime import datetime
+
+# Content-addressed production archive. Each distinct file content is
+# stored once under objects/<sha256> (hashed before any copy); archive
+# folders hardlink to those objects and carry a manifest.json that
+# verify_archive() re-checks. Objects are copies rather than links to the
+# outputs, because the next run rewrites the outputs in place; content that
+# is already stored is only hashed, never copied again.
+
+ARCHIVE_ROOT = "data/backups/production"
+OBJECTS_DIR = os.path.join(ARCHIVE_ROOT, "objects")
+CHECKSUM_INDEX = os.path.join(ARCHIVE_ROOT, "checksums.json")
+BLOCK_SIZE = 2**20
+
+
+def read_checksum_index():
+    """path -> [size, mtime_ns, sha256] for files archived before"""
+    if not os.path.exists(CHECKSUM_INDEX):
+        return {}
+    try:
+        with open(CHECKSUM_INDEX) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}  # A damaged index only costs a re-hash
+
+
+def write_checksum_index(index):
+    os.makedirs(ARCHIVE_ROOT, exist_ok=True)
+    tmp_path = f"{CHECKSUM_INDEX}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, CHECKSUM_INDEX)
+
+
+def object_path(digest):
+    return os.path.join(OBJECTS_DIR, digest)
+
+
+def file_digest(file_path):
+    """SHA-256 of a file, streamed in blocks"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def store_object(file_path, index):
+    """(digest, size, newly stored) for a file, copied into the object store
+
+    Unchanged files (same size and mtime as last time) whose object exists
+    are not read at all. Rewritten files are hashed first and only copied
+    when their content is not stored yet, so an output rewritten with the
+    same bytes costs one read and no write.
+    """
+    stat = os.stat(file_path)
+    key = os.path.abspath(file_path)
+    known = index.get(key)
+    if known and known[:2] == [stat.st_size, stat.st_mtime_ns] and os.path.exists(object_path(known[2])):
+        return known[2], stat.st_size, False
+
+    digest = file_digest(file_path)
+    stored = not os.path.exists(object_path(digest))
+    if stored:
+        os.makedirs(OBJECTS_DIR, exist_ok=True)
+        copied = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=OBJECTS_DIR, suffix=".tmp")
+        try:
+            with open(file_path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                for block in iter(lambda: src.read(BLOCK_SIZE), b""):
+                    copied.update(block)
+                    dst.write(block)
+            # The copy is hashed again in case the file changed after the first pass
+            digest = copied.hexdigest()
+            stored = not os.path.exists(object_path(digest))
+            if not stored:
+                os.remove(tmp_path)  # Same content archived before
+            else:
+                os.chmod(tmp_path, 0o444)  # Shared by every archive that links it
+                os.replace(tmp_path, object_path(digest))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    index[key] = [stat.st_size, stat.st_mtime_ns, digest]
+    return digest, stat.st_size, stored
+
+
+def link_object(digest, target_path):
+    """Hardlink an object into an archive folder (copy across filesystems)"""
+    try:
+        os.link(object_path(digest), target_path)
+        return "linked"
+    except OSError:
+        shutil.copy2(object_path(digest), target_path)
+        return "copied"
+
+
+def archive_files(file_paths, archive_path, source_dir=None):
+    """Archive files by content and write the archive manifest"""
+    os.makedirs(archive_path, exist_ok=True)
+    index = read_checksum_index()
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "source_dir": source_dir,
+        "files": {},
+    }
+    stored = 0
+
+    for file_path in file_paths:
+        digest, size, new = store_object(file_path, index)
+        file_name = os.path.basename(file_path)
+        link_object(digest, os.path.join(archive_path, file_name))
+        manifest["files"][file_name] = {"sha256": digest, "size": size}
+        stored += new
+
+    write_checksum_index(index)
+    with open(os.path.join(archive_path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest, stored
+
+
+def verify_archive(archive_path):
+    """Re-hash an archive against its manifest; returns a list of problems"""
+    manifest_file = os.path.join(archive_path, "manifest.json")
+    if not os.path.exists(manifest_file):
+        return [f"No manifest.json in {archive_path}"]
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    problems = []
+    for file_name, expected in manifest["files"].items():
+        file_path = os.path.join(archive_path, file_name)
+        if not os.path.exists(file_path):
+            problems.append(f"{file_name}: missing")
+        elif os.path.getsize(file_path) != expected["size"]:
+            problems.append(f"{file_name}: size {os.path.getsize(file_path)} != {expected['size']}")
+        elif file_digest(file_path) != expected["sha256"]:
+            problems.append(f"{file_name}: checksum mismatch")
+    return problems
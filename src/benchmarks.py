@@ -0,0 +1,292 @@
+import os
+import sys
+import math
+import time
+import sqlite3
+import hashlib
+import subprocess
+from datetime import datetime
+from functools import lru_cache
+
+# Benchmark history: every timed stage run (extract, delta, validate,
+# reconcile) is appended to a local SQLite store keyed by stage, module,
+# row count and code version. compare_versions() runs a Welch t-test per
+# stage/module/rows group to flag slowdowns and memory growth between a
+# baseline and a candidate code version. Kept free of pandas.
+
+HISTORY_DB = "data/benchmarks/history.sqlite"
+SIGNIFICANCE = 0.05  # One-sided p-value for a regression
+MIN_CHANGE = 0.10  # Ignore significant but small (<10%) changes
+MIN_GROWTH_MB = 1.0  # Memory growth changes are relative to at least this much
+COMPARED_METRICS = ("seconds", "rss_growth_mb")  # Per-stage cost, not process size
+
+
+def get_benchmark_settings(config):
+    """Read benchmark settings with safe defaults (recording on)"""
+    settings = config.get("benchmarks", {}) or {}
+    return {
+        "enabled": bool(settings.get("enabled", True)),
+        "path": settings.get("path", HISTORY_DB),
+    }
+
+
+@lru_cache(maxsize=1)
+def src_hash():
+    """Short hash of the package's .py files (changes with any code edit)"""
+    digest = hashlib.sha256()
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in sorted(os.listdir(src_dir)):
+        if name.endswith(".py"):
+            with open(os.path.join(src_dir, name), "rb") as f:
+                digest.update(name.encode("utf-8") + b"\0" + f.read())
+    return digest.hexdigest()[:8]
+
+
+@lru_cache(maxsize=1)
+def code_version():
+    """Git revision (plus a src hash when src/ has local edits), else a src hash"""
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "src"],
+            capture_output=True, text=True, check=True, timeout=10,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return f"src-{src_hash()}"
+    return f"{rev}+{src_hash()}" if dirty else rev
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        import resource  # Peak RSS where /proc is unavailable (KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def open_history(path=HISTORY_DB):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS runs ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, recorded_at TEXT NOT NULL, "
+        "phase TEXT, stage TEXT NOT NULL, module TEXT NOT NULL, rows INTEGER, "
+        "code_version TEXT NOT NULL, config_hash TEXT, "
+        "seconds REAL NOT NULL, rss_mb REAL, rss_growth_mb REAL)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS runs_key ON runs (stage, module, rows, code_version)"
+    )
+    return conn
+
+
+def record_run(path, phase, stage, module, rows, seconds, rss_mb, rss_growth_mb, config_hash=None):
+    """Append one stage timing to the history store"""
+    conn = open_history(path)
+    try:
+        with conn:
+            conn.execute(
+                "INSERT INTO runs (recorded_at, phase, stage, module, rows, code_version, "
+                "config_hash, seconds, rss_mb, rss_growth_mb) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (datetime.now().isoformat(timespec="seconds"), phase, stage, module, rows,
+                 code_version(), config_hash, seconds, rss_mb, rss_growth_mb),
+            )
+    finally:
+        conn.close()
+
+
+def result_rows(result):
+    """Row count of a stage result: frames, (frame, ...) tuples or report dicts"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if isinstance(result, dict):
+        return result.get("total_records", result.get("total_source"))
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def timed_stage(stage, module, config, compute):
+    """Run a stage, recording wall time and RSS in the benchmark history"""
+    settings = get_benchmark_settings(config)
+    if not settings["enabled"]:
+        return compute()
+
+    rss_before = current_rss_mb()
+    started = time.perf_counter()
+    result = compute()
+    seconds = time.perf_counter() - started
+    rss_after = current_rss_mb()
+    try:
+        record_run(settings["path"], config.get("phase"), stage, module, result_rows(result),
+                   seconds, rss_after, rss_after - rss_before, getattr(config, "config_hash", None))
+    except sqlite3.Error as e:
+        print(f"  Benchmark not recorded: {str(e)}")
+    return result
+
+
+# Welch's t-test. Student's t tail via the regularized incomplete beta
+# function (continued fraction, as in Numerical Recipes) - no scipy needed.
+
+def _betacf(a, b, x):
+    tiny = 1e-300
+    qab, qap, qam = a + b, a + 1.0, a - 1.0
+    c, d = 1.0, 1.0 - qab * x / qap
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 201):
+        m2 = 2 * m
+        aa = m * (b - m) * x / ((qam + m2) * (a + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        h *= d * c
+        aa = -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))
+        d = 1.0 + aa * d
+        d = 1.0 / (d if abs(d) > tiny else tiny)
+        c = 1.0 + aa / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1.0) < 3e-12:
+            break
+    return h
+
+
+def _betainc(a, b, x):
+    """Regularized incomplete beta I_x(a, b)"""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1.0 - x)
+    )
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1.0 - x) / b
+
+
+def _mean_var(values):
+    mean = sum(values) / len(values)
+    return mean, sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+
+
+def welch_t_test(baseline, candidate):
+    """(t, p) for candidate > baseline (one-sided); None with fewer than 2 samples each"""
+    if len(baseline) < 2 or len(candidate) < 2:
+        return None
+    mean_a, var_a = _mean_var(baseline)
+    mean_b, var_b = _mean_var(candidate)
+    se_a, se_b = var_a / len(baseline), var_b / len(candidate)
+    if se_a + se_b == 0:
+        # No spread at all: any difference is certain, none is a coin flip
+        if mean_b == mean_a:
+            return 0.0, 0.5
+        return (math.inf, 0.0) if mean_b > mean_a else (-math.inf, 1.0)
+    t = (mean_b - mean_a) / math.sqrt(se_a + se_b)
+    df = (se_a + se_b) ** 2 / (se_a ** 2 / (len(baseline) - 1) + se_b ** 2 / (len(candidate) - 1))
+    tail = 0.5 * _betainc(df / 2.0, 0.5, df / (df + t * t))  # P(T > |t|)
+    return t, tail if t > 0 else 1.0 - tail
+
+
+def list_versions(path=HISTORY_DB):
+    """Recorded code versions, oldest first: (version, first seen, runs)"""
+    if not os.path.exists(path):
+        return []
+    conn = open_history(path)
+    try:
+        return conn.execute(
+            "SELECT code_version, MIN(recorded_at), COUNT(*) FROM runs "
+            "GROUP BY code_version ORDER BY MIN(id)"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def _samples(conn, version, phase):
+    sql = "SELECT stage, module, rows, seconds, rss_growth_mb FROM runs WHERE code_version = ?"
+    params = [version]
+    if phase:
+        sql += " AND phase = ?"
+        params.append(phase)
+    groups = {}
+    for stage, module, rows, seconds, rss_growth_mb in conn.execute(sql, params):
+        group = groups.setdefault((stage, module, rows), {metric: [] for metric in COMPARED_METRICS})
+        group["seconds"].append(seconds)
+        if rss_growth_mb is not None:
+            group["rss_growth_mb"].append(rss_growth_mb)
+    return groups
+
+
+def compare_versions(baseline, candidate, phase=None, path=HISTORY_DB,
+                     alpha=SIGNIFICANCE, min_change=MIN_CHANGE):
+    """Per stage/module/rows group: means, change and regression flags per metric"""
+    conn = open_history(path)
+    try:
+        base_groups = _samples(conn, baseline, phase)
+        cand_groups = _samples(conn, candidate, phase)
+    finally:
+        conn.close()
+
+    results = []
+    for key in sorted(set(base_groups) & set(cand_groups), key=lambda k: tuple(map(str, k))):
+        stage, module, rows = key
+        row = {"stage": stage, "module": module, "rows": rows, "metrics": {}}
+        for metric in COMPARED_METRICS:
+            base, cand = base_groups[key][metric], cand_groups[key][metric]
+            if not base or not cand:
+                continue
+            base_mean, cand_mean = sum(base) / len(base), sum(cand) / len(cand)
+            # Growth can be ~0 or negative: measure its change against a floor
+            scale = max(abs(base_mean), MIN_GROWTH_MB) if metric == "rss_growth_mb" else base_mean
+            change = (cand_mean - base_mean) / scale if scale else 0.0
+            test = welch_t_test(base, cand)
+            row["metrics"][metric] = {
+                "baseline": base_mean,
+                "candidate": cand_mean,
+                "samples": (len(base), len(cand)),
+                "change": change,
+                "p_value": test[1] if test else None,
+                "regression": bool(test and test[1] < alpha and change > min_change),
+            }
+        results.append(row)
+    return results
+
+
+def print_comparison(baseline, candidate, results, alpha=SIGNIFICANCE, min_change=MIN_CHANGE):
+    """Table of compared groups; returns the number of regressions"""
+    print(f"Benchmark comparison: {baseline} (baseline) -> {candidate} (candidate)\n")
+    if not results:
+        print("  No stage/module/row-count groups recorded under both versions")
+        return 0
+
+    regressions = 0
+    totals = [0.0, 0.0]
+    print(f"  {'Stage':<32} {'Module':<14} {'Rows':>10}  {'Metric':<13} "
+          f"{'Baseline':>10} {'Candidate':>10} {'Change':>8} {'n':>7} {'p':>7}")
+    for row in results:
+        for metric, m in row["metrics"].items():
+            if metric == "seconds":
+                totals[0] += m["baseline"]
+                totals[1] += m["candidate"]
+            unit = "s" if metric == "seconds" else "MB"
+            p_value = f"{m['p_value']:.3f}" if m["p_value"] is not None else "n/a"
+            flag = "  ⚠️  REGRESSION" if m["regression"] else ""
+            regressions += m["regression"]
+            print(f"  {row['stage']:<32} {row['module']:<14} {str(row['rows']):>10}  {metric:<13} "
+                  f"{m['baseline']:>8.2f}{unit:<2} {m['candidate']:>8.2f}{unit:<2} "
+                  f"{m['change']:>+7.0%} {'%d/%d' % m['samples']:>7} {p_value:>7}{flag}")
+
+    print(f"\n  Total stage time: {totals[0]:.2f}s -> {totals[1]:.2f}s")
+    print(f"  {regressions} significant regression(s) "
+          f"(one-sided Welch t-test, p < {alpha}, change > {min_change:.0%})")
+    return regressions
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+from .transformation import DEFAULT_TRANSFORMS, DATE_INPUT_FORMAT, DATE_OUTPUT_FORMAT, parse_dates, format_dates
+
+# Canonical values for change detection and reconciliation. Text is
+# trimmed and nulls and empty strings are one token. Columns the plan
+# marks numeric (numeric transform ops, positive_values rules) are written
+# as plain decimals, so 5000.0 and "5000.00 " compare equal; date columns
+# (the module's date transforms) are written as ISO dates. Everything else
+# - keys included - stays text, so "0012" and "12" remain distinct.
+
+NULL_TOKEN = "\x00"
+NULL_TEXT = frozenset({"", "nan", "none", "null", "nat", "<na>"})
+ISO_DATE = "%Y-%m-%d"
+NUMERIC = ("numeric", None)
+
+
+def column_kinds(plan, yardi=False):
+    """Typed columns of a module, on the source or Yardi side:
+    {column: ("date", format) or NUMERIC}"""
+    spec = plan.transform_spec
+    if spec is None:
+        spec = DEFAULT_TRANSFORMS.get(plan.module, [])
+
+    def column(field):
+        return field if yardi else plan.source_column(field, field)
+
+    kinds = {column(field): NUMERIC for field in plan.validation_rules.get("positive_values", [])}
+    for item in spec:
+        if item.get("op") == "numeric":
+            kinds.update((column(field), NUMERIC) for field in item["fields"])
+        elif item.get("op") == "date":
+            key = "output_format" if yardi else "input_format"
+            default = DATE_OUTPUT_FORMAT if yardi else DATE_INPUT_FORMAT
+            kinds.update((column(field), ("date", item.get(key, default))) for field in item["fields"])
+    return kinds
+
+
+def hash_columns(plan, columns):
+    """Columns that decide whether a record changed: mapped and key columns, sorted"""
+    wanted = set(plan.field_map) | set(plan.key_columns)
+    chosen = sorted(col for col in columns if col in wanted)
+    return chosen or sorted(columns)
+
+
+def _decimal_text(numbers):
+    """Plain decimal text: integral values without a fraction, others shortest repr"""
+    if pd.api.types.is_integer_dtype(numbers):
+        return numbers.astype(str).to_numpy(dtype=object)
+    values = numbers.to_numpy(dtype=float)
+    text = values.astype(str).astype(object)
+    integral = (values == np.trunc(values)) & (np.abs(values) < 2**53)
+    text[integral] = values[integral].astype(np.int64).astype(str)
+    return text
+
+
+def canonical_values(values, kind=None):
+    """Type-stable text for one column (kind from column_kinds, None for text)"""
+    text = values.astype(str).str.strip()
+    is_null = values.isna().to_numpy() | text.str.lower().isin(NULL_TEXT).to_numpy()
+    result = text.to_numpy(dtype=object, copy=True)
+    pending = ~is_null
+
+    if kind is None and pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        # Already parsed as numbers by pandas: there is no text to keep, and
+        # a float column (ints with blanks) would otherwise render 12 as "12.0"
+        kind = NUMERIC
+
+    if kind is not None and kind[0] == "date":
+        dates = parse_dates(text, kind[1])
+        is_date = pending & dates.notna().to_numpy()
+        if is_date.any():
+            result[is_date] = format_dates(dates[is_date], ISO_DATE).to_numpy()
+
+    elif kind == NUMERIC and pending.any():
+        numbers = pd.to_numeric(text[pending], errors="coerce")
+        is_number = numbers.notna().to_numpy()
+        if is_number.any():
+            numbers = numbers[is_number]
+            finite = np.isfinite(numbers.to_numpy(dtype=float))
+            positions = np.flatnonzero(pending)[is_number][finite]
+            result[positions] = _decimal_text(numbers[finite])
+
+    result[is_null] = NULL_TOKEN
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def canonical_frame(df, kinds=None):
+    """Canonical text for every column of a frame"""
+    kinds = kinds or {}
+    return pd.DataFrame(
+        {col: canonical_values(df[col], kinds.get(col)) for col in df.columns},
+        index=df.index,
+    )
+
+
+def canonical_hashes(df, kinds=None):
+    """Vectorized 64-bit row hashes over canonical values, in column order"""
+    return pd.util.hash_pandas_object(canonical_frame(df, kinds), index=False)
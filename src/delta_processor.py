@@ -1,81 +1,87 @@
 import pandas as pd
 import os
 import chardet  # Add this import
-from .utils import create_row_hash
-from .extraction import robust_csv_reader  # Import robust reader
+from .utils import get_key_columns, get_duplicate_policy
+from .extraction import read_source_file, read_concurrently, get_read_workers
+from .staging import use_staging, staged_delta_records
+from .frame_registry import remember_frame, recall_frame, indexed_frame, frame_row_hashes
+from .profiling import profile_frame, write_profile
+from .migration_plan import get_module_plan
+from .canonical import column_kinds, hash_columns
 
-def get_delta_records(module, config):
+def get_delta_records(module, config, frames=None):
     """Accurate change detection with stable hashing"""
+    delta_df, _ = get_delta_changes(module, config, frames)
+    return delta_df
+
+def get_delta_changes(module, config, frames=None):
+    """New/changed records plus keys deleted since the reference phase, in one pass"""
     # 1. Load current full dataset
     current_file = f"data/sources/{config['phase']}/{module}.csv"
     if not os.path.exists(current_file):
-        return pd.DataFrame()
-    
-    # Detect file encoding
-    with open(current_file, 'rb') as f:
-        rawdata = f.read(10000)  # Read first 10KB to detect encoding
-        result = chardet.detect(rawdata)
-        encoding = result['encoding']
+        return pd.DataFrame(), pd.DataFrame()
     
-    try:
-        # Try reading with detected encoding
-        current_df = pd.read_csv(current_file, encoding=encoding)
-    except:
-        try:
-            # Fallback to UTF-16 with BOM handling
-            current_df = pd.read_csv(current_file, encoding='utf-16')
-        except:
-            # Use robust reader as last resort
-            print(f"  Using robust reader for {current_file}")
-            current_df = robust_csv_reader(current_file)
-    
-    # 2. Load reference dataset
+    # Datasets too large for memory are compared inside the staging database
     ref_phase = config["delta_settings"]["reference_phase"]
     ref_file = f"data/sources/{ref_phase}/{module}.csv"
+    if os.path.exists(ref_file) and use_staging([current_file, ref_file], config):
+        with open(current_file, 'rb') as f:
+            encoding = chardet.detect(f.read(10000))['encoding']
+        with open(ref_file, 'rb') as f:
+            ref_encoding = chardet.detect(f.read(10000))['encoding']
+        return staged_delta_records(
+            module, config, current_file, ref_file, encoding, ref_encoding
+        )
     
-    if not os.path.exists(ref_file):
-        return current_df  # First run
+    # Combined runs keep parsed frames so the next phase reuses them as reference;
+    # whichever of the two files still needs parsing is read concurrently
+    has_ref = os.path.exists(ref_file)
+    current = recall_frame(frames, current_file)
+    reference = recall_frame(frames, ref_file) if has_ref else None
+    to_read = [current_file] if current is None else []
+    if has_ref and reference is None:
+        to_read.append(ref_file)
+    parsed = read_concurrently(read_source_file, to_read, get_read_workers(config))
     
-    # Detect encoding for reference file
-    with open(ref_file, 'rb') as f:
-        rawdata = f.read(10000)
-        result = chardet.detect(rawdata)
-        encoding = result['encoding']
+    if current is None:
+        current = remember_frame(frames, current_file, parsed[current_file])
+        write_profile(profile_frame(current["frame"], module, config), module, config['phase'], current_file)
+    current_df = current["frame"]
     
-    try:
-        ref_df = pd.read_csv(ref_file, encoding=encoding)
-    except:
-        try:
-            ref_df = pd.read_csv(ref_file, encoding='utf-16')
-        except:
-            print(f"  Using robust reader for {ref_file}")
-            ref_df = robust_csv_reader(ref_file)
-    
-    # ... rest of the function remains the same ...
-    
-    if not os.path.exists(ref_file):
-        return current_df  # First run
-    
-    ref_df = pd.read_csv(ref_file)
+    # 2. Load reference dataset
+    if not has_ref:
+        return current_df.copy(), pd.DataFrame()  # First run
     
-    # 3. Get key column
-    key_col = config["delta_settings"]["key_columns"][module]
+    if reference is None:
+        reference = remember_frame(frames, ref_file, parsed[ref_file])
+    else:
+        print(f"  Reusing parsed {ref_phase} {module} frame as delta reference")
     
-    # 4. Find new records
-    current_keys = set(current_df[key_col].astype(str))
-    ref_keys = set(ref_df[key_col].astype(str))
-    new_records = current_df[~current_df[key_col].astype(str).isin(ref_keys)]
+    # 3. Index both datasets by (composite) key, applying the duplicate policy
+    key_cols = get_key_columns(config, module)
+    policy = get_duplicate_policy(config, module)
+    current_idx = indexed_frame(current, key_cols, policy, f"{config['phase']} {module}")
+    ref_idx = indexed_frame(reference, key_cols, policy, f"{ref_phase} {module}")
     
-    # 5. Find changed records
-    common_keys = current_keys & ref_keys
-    changed_records = []
+    # 4. Find new records, and deleted keys (in reference but gone from current)
+    is_new = ~current_idx.index.isin(ref_idx.index)
+    new_records = current_idx[is_new]
+    deleted_keys = ref_idx.loc[~ref_idx.index.isin(current_idx.index), key_cols]
     
-    for key in common_keys:
-        current_row = current_df[current_df[key_col].astype(str) == key].iloc[0]
-        ref_row = ref_df[ref_df[key_col].astype(str) == key].iloc[0]
-        
-        if create_row_hash(current_row) != create_row_hash(ref_row):
-            changed_records.append(current_row)
+    # 5. Find changed records by comparing canonical row hashes of common keys
+    # over the mapped columns, so dtype drift between phases is not a change
+    common = current_idx[~is_new]
+    plan = get_module_plan(config, module)
+    columns = hash_columns(plan, current_idx.columns)
+    if columns != hash_columns(plan, ref_idx.columns):
+        # Schema drift in the mapped columns changes every record
+        changed_records = common
+    else:
+        kinds = column_kinds(plan)
+        current_hashes = frame_row_hashes(current, key_cols, policy, columns, kinds)[~is_new]
+        ref_hashes = frame_row_hashes(reference, key_cols, policy, columns, kinds).loc[common.index]
+        changed_records = common[current_hashes.to_numpy() != ref_hashes.to_numpy()]
     
     # 6. Combine results
-    return pd.concat([new_records, pd.DataFrame(changed_records)], ignore_index=True)
\ No newline at end of file
+    delta_df = pd.concat([new_records, changed_records], ignore_index=True)
+    return delta_df, deleted_keys.reset_index(drop=True)
@@ -1,8 +1,20 @@
 import pandas as pd
 import os
 import csv
+import re
+import codecs
+import chardet
+from concurrent.futures import ThreadPoolExecutor
+from .utils import get_key_columns
+from .frame_registry import remember_frame, recall_frame
+from .sampling import get_sampling_settings, sampling_columns, stratified_sample
+from .profiling import profile_frame, profiled, write_profile
 
-def extract_data(module, config):
+DEFAULT_CHUNK_SIZE = 100000
+ROBUST_CHUNK_ROWS = 50000
+DEFAULT_READ_WORKERS = 4
+
+def extract_data(module, config, frames=None):
     """Get data from legacy systems with error handling"""
     phase = config.get('phase')
     if not phase:
@@ -19,64 +31,200 @@ def extract_data(module, config):
         open(file_path, 'a').close()
         return pd.DataFrame()
     
+    # Only read columns that mapping, delta keys or validation will use
+    wanted = get_source_columns(module, config)
+    properties = config.get("properties")
+    sampling = get_sampling_settings(config, module)
+    
+    def collect(chunks):
+        # Sample or filter representative properties chunk by chunk while reading
+        if sampling:
+            return stratified_sample(chunks, module, config)
+        parts = [filter_properties(chunk, properties) if properties else chunk for chunk in chunks]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    
+    if frames is not None:
+        # Combined runs parse the full file once so the next phase can reuse
+        # it as its delta reference, then project and filter in memory
+        entry = recall_frame(frames, file_path)
+        if entry is None:
+            entry = remember_frame(frames, file_path, read_source_file(file_path))
+        df = entry["frame"]
+        df = df[[col for col in df.columns if col in wanted]]
+        write_profile(profile_frame(df, module, config), module, phase, file_path)
+        df = collect([df])
+        return ensure_key_columns(df, module, config)
+    
+    # Column profiles are sketched from the same read, before sampling/filtering
+    profile = {}
+    encoding = detect_encoding(file_path)
     try:
         # First try standard CSV reading
-        df = pd.read_csv(file_path)
-    except pd.errors.ParserError:
+        if properties or sampling:
+            chunk_size = config.get("performance", {}).get("chunk_size", DEFAULT_CHUNK_SIZE)
+            df = collect(profiled(pd.read_csv(
+                file_path, usecols=lambda col: col in wanted, chunksize=chunk_size, encoding=encoding
+            ), module, config, profile))
+        else:
+            df = pd.read_csv(file_path, usecols=lambda col: col in wanted, encoding=encoding)
+            profile_frame(df, module, config, profile)
+    except (pd.errors.ParserError, UnicodeDecodeError):
+        # Bad bytes past the encoding sample are replaced by the robust reader
         print(f"  CSV parsing error detected - using robust reader")
-        df = robust_csv_reader(file_path)
+        stats = {}
+        profile = {}
+        df = collect(profiled(iter_robust_csv(file_path, usecols=wanted, stats=stats),
+                              module, config, profile))
+        print(f"  Repaired {stats.get('padded', 0) + stats.get('truncated', 0)} of "
+              f"{stats.get('rows', 0)} rows ({stats.get('padded', 0)} padded, "
+              f"{stats.get('truncated', 0)} truncated)")
     
-    # Filter for representative properties
-    if "properties" in config:
-        if "property_id" in df.columns:
-            df = df[df["property_id"].isin(config["properties"])]
+    write_profile(profile, module, phase, file_path)
+    return ensure_key_columns(df, module, config)
 
-    # Validate key column exists
-    key_col = config["delta_settings"]["key_columns"][module]
-    if key_col not in df.columns:
-        print(f"  WARNING: Key column '{key_col}' missing in source data")
-        # Add empty key column to prevent downstream failures
-        df[key_col] = ""
+def ensure_key_columns(df, module, config):
+    """Validate key columns exist"""
+    for key_col in get_key_columns(config, module):
+        if key_col not in df.columns:
+            print(f"  WARNING: Key column '{key_col}' missing in source data")
+            # Add empty key column to prevent downstream failures
+            df[key_col] = ""
     
     return df
 
+def read_source_file(file_path):
+    """Read a full source file, detecting its encoding and falling back to the robust reader"""
+    with open(file_path, 'rb') as f:
+        rawdata = f.read(10000)  # Read first 10KB to detect encoding
+        encoding = chardet.detect(rawdata)['encoding']
     
+    try:
+        # Try reading with detected encoding
+        return pd.read_csv(file_path, encoding=encoding)
+    except Exception:
+        try:
+            # Fallback to UTF-16 with BOM handling
+            return pd.read_csv(file_path, encoding='utf-16')
+        except Exception:
+            # Use robust reader as last resort
+            print(f"  Using robust reader for {file_path}")
+            return robust_csv_reader(file_path)
 
-def robust_csv_reader(file_path):
-    """Handle malformed CSV files with inconsistent columns and BOM"""
-    rows = []
-    encodings = ['utf-8-sig', 'utf-16', 'latin1']  # Try different encodings
+def get_read_workers(config):
+    """Threads for concurrent file reads (performance.max_workers)"""
+    return max(1, int(config.get("performance", {}).get("max_workers", DEFAULT_READ_WORKERS)))
+
+def read_concurrently(read, file_paths, max_workers):
+    """{path: read(path)} with the reads run on a bounded thread pool
+
+    CSV parsing and decoding release the GIL, so independent files read in
+    parallel; a single file is read inline.
+    """
+    if len(file_paths) <= 1 or max_workers <= 1:
+        return {path: read(path) for path in file_paths}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as pool:
+        return dict(zip(file_paths, pool.map(read, file_paths)))
+
+def get_source_columns(module, config):
+    """Source columns referenced by field mappings, delta keys and validation rules"""
+    field_map = config["field_mappings"].get(module, {})
+    source_columns = {v: k for k, v in field_map.items()}
     
-    for encoding in encodings:
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                reader = csv.reader(f)
-                header = next(reader)
-                expected_cols = len(header)
-                
-                for row in reader:
-                    # Fix row length issues
-                    if len(row) > expected_cols:
-                        row = row[:expected_cols]
-                    elif len(row) < expected_cols:
-                        row += [''] * (expected_cols - len(row))
-                    rows.append(row)
-                
-                return pd.DataFrame(rows, columns=header)
-        except UnicodeDecodeError:
-            continue  # Try next encoding
-    
-    # If all encodings fail, use default with error suppression
-    with open(file_path, 'r', errors='replace') as f:
-        reader = csv.reader(f)
-        header = next(reader)
+    columns = set(field_map.keys())
+    columns.update(get_key_columns(config, module))
+    columns.update(sampling_columns(config, module))
+    if "properties" in config:
+        columns.add("property_id")
+    
+    # Validation rules name Yardi fields - translate back to source names
+    rules = config["validation_rules"].get(module, {})
+    yardi_fields = set(rules.get("required", []))
+    yardi_fields.update(rules.get("positive_values", []))
+    yardi_fields.update(rules.get("value_maps", {}).keys())
+    for expression in rules.get("date_ranges", []) + rules.get("business_rules", []):
+        yardi_fields.update(re.findall(r"[A-Za-z_][A-Za-z0-9_]*", expression))
+    for field in yardi_fields:
+        if field in source_columns:
+            columns.add(source_columns[field])
+    
+    return columns
+
+def filter_properties(df, properties):
+    """Keep only rows for the representative properties"""
+    if "property_id" not in df.columns:
+        return df
+    return df[df["property_id"].isin(properties)]
+
+def detect_encoding(file_path, sample_size=65536):
+    """Settle a file's encoding once from its BOM or a leading sample"""
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    if sample.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    # BOM-less UTF-16 shows up as NUL bytes in every other position
+    if sample and sample[1::2].count(0) > len(sample) // 4:
+        return 'utf-16-le'
+    if sample and sample[0::2].count(0) > len(sample) // 4:
+        return 'utf-16-be'
+    
+    try:
+        # Incremental decode tolerates a multi-byte char cut at the sample end
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        return 'latin1'
+
+def iter_robust_csv(file_path, chunk_size=ROBUST_CHUNK_ROWS, usecols=None, sep=',', stats=None):
+    """Stream a malformed CSV as DataFrame chunks, repairing row lengths on the fly"""
+    if stats is None:
+        stats = {}
+    stats.update({"encoding": detect_encoding(file_path), "rows": 0, "padded": 0, "truncated": 0})
+    
+    # Undecodable bytes later in the file are replaced rather than restarting
+    with open(file_path, 'r', encoding=stats["encoding"], errors='replace', newline='') as f:
+        reader = csv.reader(f, delimiter=sep)
+        header = next(reader, None)
+        if not header:
+            return
         expected_cols = len(header)
         
+        keep = [i for i, col in enumerate(header) if usecols is None or col in usecols]
+        columns = [header[i] for i in keep]
+        project = None if len(keep) == expected_cols else keep
+        
+        rows = []
         for row in reader:
-            if len(row) > expected_cols:
-                row = row[:expected_cols]
-            elif len(row) < expected_cols:
-                row += [''] * (expected_cols - len(row))
-            rows.append(row)
+            # Fix row length issues
+            if len(row) != expected_cols:
+                if len(row) > expected_cols:
+                    row = row[:expected_cols]
+                    stats["truncated"] += 1
+                else:
+                    row += [''] * (expected_cols - len(row))
+                    stats["padded"] += 1
+            rows.append(row if project is None else [row[i] for i in project])
+            
+            if len(rows) >= chunk_size:
+                stats["rows"] += len(rows)
+                yield pd.DataFrame(rows, columns=columns)
+                rows = []
         
-        return pd.DataFrame(rows, columns=header)
\ No newline at end of file
+        stats["rows"] += len(rows)
+        if rows or stats["rows"] == 0:
+            yield pd.DataFrame(rows, columns=columns)
+
+def robust_csv_reader(file_path, usecols=None):
+    """Handle malformed CSV files with inconsistent columns and BOM"""
+    stats = {}
+    chunks = list(iter_robust_csv(file_path, usecols=usecols, stats=stats))
+    if stats.get("padded") or stats.get("truncated"):
+        print(f"  Repaired {stats['padded'] + stats['truncated']} of {stats['rows']} rows "
+              f"({stats['padded']} padded, {stats['truncated']} truncated, {stats['encoding']})")
+    
+    if not chunks:
+        return pd.DataFrame()
+    return pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
@@ -0,0 +1,59 @@
+from .utils import build_key_index
+from .canonical import canonical_hashes
+from .run_manifest import file_fingerprint
+
+# In-process registry of parsed source frames, keyed by file path, so a
+# combined DM1 -> DM2 -> DM3 run can reuse one phase's sources as the next
+# phase's delta reference without re-reading them.
+
+
+def remember_frame(frames, file_path, df):
+    """Register a freshly parsed source frame (no-op outside combined runs)"""
+    entry = {
+        "fingerprint": file_fingerprint(file_path),
+        "frame": df,
+        "indexes": {},
+        "row_hashes": {},
+    }
+    if frames is not None:
+        frames[file_path] = entry
+    return entry
+
+
+def recall_frame(frames, file_path):
+    """Return the registered entry for a file if it is unchanged on disk"""
+    if not frames or file_path not in frames:
+        return None
+    entry = frames[file_path]
+    if entry["fingerprint"] != file_fingerprint(file_path):
+        del frames[file_path]
+        return None
+    return entry
+
+
+def indexed_frame(entry, key_cols, policy, label):
+    """Key-indexed (and de-duplicated) frame, built once per key definition"""
+    signature = (tuple(key_cols), policy)
+    if signature not in entry["indexes"]:
+        entry["indexes"][signature] = build_key_index(entry["frame"], key_cols, policy, label)
+    return entry["indexes"][signature]
+
+
+def frame_row_hashes(entry, key_cols, policy, columns, kinds=None):
+    """Canonical row hashes over the given columns of the key-indexed frame, built once"""
+    kinds = kinds or {}
+    signature = (tuple(key_cols), policy, tuple(columns), tuple(sorted(kinds.items())))
+    if signature not in entry["row_hashes"]:
+        indexed = entry["indexes"][(tuple(key_cols), policy)]
+        hashes = canonical_hashes(indexed[list(columns)], kinds)
+        hashes.index = indexed.index
+        entry["row_hashes"][signature] = hashes
+    return entry["row_hashes"][signature]
+
+
+def retain_phase_frames(frames, phase):
+    """Drop frames that the next phase cannot use as its reference"""
+    prefix = f"data/sources/{phase}/"
+    for file_path in list(frames):
+        if not file_path.startswith(prefix):
+            del frames[file_path]
@@ -0,0 +1,172 @@
+import time
+import uuid
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from .yardi_loader import generate_yardi_files
+
+# Loader backends: where transformed records go once they pass validation.
+# "file" writes the Yardi import files (manual import, the default); "http"
+# also pushes the records to an import endpoint in batches. Every backend
+# takes (df, module, phase, config) and returns throughput/latency metrics.
+
+
+def get_loader_settings(config):
+    """Read loader settings with safe defaults (file backend unless configured)"""
+    settings = config.get("loader", {}) or {}
+    return {
+        "backend": settings.get("backend", "file"),
+        "url": settings.get("url", "http://127.0.0.1:8765"),
+        "batch_size": int(settings.get("batch_size", 500)),
+        "concurrency": int(settings.get("concurrency", 4)),
+        "max_pending": int(settings.get("max_pending", 8)),
+        "retries": int(settings.get("retries", 3)),
+        "backoff_seconds": float(settings.get("backoff_seconds", 0.5)),
+        "timeout": float(settings.get("timeout_seconds", 30)),
+        "keep_files": bool(settings.get("keep_files", True)),
+    }
+
+
+def load_metrics(backend, records, batches, seconds, latencies, retries=0):
+    """Throughput and per-batch latency summary"""
+    latencies = sorted(latencies)
+
+    def percentile(fraction):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] * 1000, 1)
+
+    return {
+        "backend": backend,
+        "records": records,
+        "batches": batches,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(records / seconds) if seconds > 0 else None,
+        "latency_p50_ms": percentile(0.50),
+        "latency_p95_ms": percentile(0.95),
+        "latency_max_ms": percentile(1.0),
+        "retries": retries,
+    }
+
+
+def load_to_files(df, module, phase, config):
+    """Write the pipe-delimited UTF-16 Yardi import files"""
+    started = time.perf_counter()
+    generate_yardi_files(df, module, phase)
+    elapsed = time.perf_counter() - started
+    return load_metrics("file", len(df), 1, elapsed, [elapsed])
+
+
+def load_over_http(df, module, phase, config):
+    """POST records in JSON batches over pooled keep-alive connections
+
+    Up to `concurrency` batches are in flight at once and at most
+    `max_pending` are serialized ahead of the workers (backpressure).
+    Failed batches are retried with exponential backoff on connection
+    errors, 429 and 5xx. Batch ids carry a per-call run id: a retry whose
+    first attempt did land is de-duplicated by the target, while a later
+    run of the same phase/module is a new batch.
+    """
+    settings = get_loader_settings(config)
+    if settings["keep_files"]:
+        generate_yardi_files(df, module, phase)  # Audit trail for reconciliation
+
+    target = urlsplit(settings["url"])
+    path = f"{target.path.rstrip('/')}/import/{module}"
+    pending = threading.BoundedSemaphore(settings["max_pending"])
+    failed = threading.Event()
+    local = threading.local()  # One connection per worker thread
+    lock = threading.Lock()
+    connections = []
+    latencies = []
+    retries = [0]
+
+    def connection():
+        if getattr(local, "conn", None) is None:
+            local.conn = http.client.HTTPConnection(
+                target.hostname, target.port or 80, timeout=settings["timeout"]
+            )
+            local.conn.connect()
+            # Headers and body go out in separate writes; without this,
+            # Nagle + delayed ACK adds ~40 ms to every request
+            local.conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with lock:
+                connections.append(local.conn)
+        return local.conn
+
+    def send(batch_id, body):
+        try:
+            for attempt in range(settings["retries"] + 1):
+                started = time.perf_counter()
+                try:
+                    conn = connection()
+                    conn.request("POST", path, body=body, headers={
+                        "Content-Type": "application/json",
+                        "X-Batch-Id": batch_id,
+                    })
+                    response = conn.getresponse()
+                    response.read()
+                    if response.status < 300:
+                        with lock:
+                            latencies.append(time.perf_counter() - started)
+                        return
+                    error = f"HTTP {response.status}"
+                    if response.status != 429 and response.status < 500:
+                        break  # Rejected - retrying will not help
+                except (OSError, http.client.HTTPException) as e:
+                    error = str(e) or type(e).__name__
+                    local.conn.close()
+                    local.conn = None
+
+                if attempt < settings["retries"]:
+                    with lock:
+                        retries[0] += 1
+                    time.sleep(settings["backoff_seconds"] * 2 ** attempt)
+
+            failed.set()
+            raise RuntimeError(f"Batch {batch_id} failed: {error}")
+        finally:
+            pending.release()
+
+    run_id = uuid.uuid4().hex[:12]
+    started = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=settings["concurrency"]) as pool:
+        for start in range(0, len(df), settings["batch_size"]):
+            if failed.is_set():
+                break
+            batch = df.iloc[start:start + settings["batch_size"]]
+            body = batch.to_json(orient="records", date_format="iso").encode("utf-8")
+            pending.acquire()  # Blocks while max_pending batches are queued
+            futures.append(pool.submit(send, f"{phase}/{module}/{run_id}/{start}", body))
+    elapsed = time.perf_counter() - started
+
+    for conn in connections:
+        conn.close()
+    for future in futures:
+        future.result()  # Surface the first failed batch
+
+    return load_metrics("http", len(df), len(futures), elapsed, latencies, retries[0])
+
+
+LOADER_BACKENDS = {
+    "file": load_to_files,
+    "http": load_over_http,
+}
+
+
+def load_records(df, module, phase, config):
+    """Load records with the configured backend and report throughput"""
+    backend = get_loader_settings(config)["backend"]
+    if backend not in LOADER_BACKENDS:
+        raise ValueError(f"Unknown loader backend: {backend}")
+
+    metrics = LOADER_BACKENDS[backend](df, module, phase, config)
+    if backend != "file":
+        print(f"  Loaded {metrics['records']} records in {metrics['batches']} batches "
+              f"via {backend}: {metrics['records_per_second']} rec/s, "
+              f"p50 {metrics['latency_p50_ms']} ms, p95 {metrics['latency_p95_ms']} ms, "
+              f"{metrics['retries']} retries")
+    return metrics
@@ -0,0 +1,201 @@
+import os
+import json
+import hashlib
+from collections.abc import Mapping
+from functools import cached_property
+import yaml
+
+# Config loading compiles a validated, read-only migration plan once per
+# config file. Stages read it like the config dict it replaces
+# (plan["field_mappings"]...), and get_module_plan() hands them reverse
+# mappings, value-map lookups and compiled validation rules built once
+# instead of on every call. Kept free of pandas so CLI startup stays fast.
+
+REQUIRED_KEYS = ['phase', 'modules', 'field_mappings', 'validation_rules']
+TRANSFORM_OPS = {  # op -> required keys
+    'default_id': ('field', 'from'),
+    'date': ('fields',),
+    'numeric': ('fields',),
+    'value_map': ('field',),
+}
+
+DEFAULT_DELTA_SETTINGS = {
+    'reference_phase': 'dm1_crp',
+    'key_columns': {
+        'leasing': 'lease_ref',
+        'ar': 'invoice_number',
+        'fixed_assets': 'asset_id'
+    }
+}
+
+_PLAN_CACHE = {}  # abspath -> ((size, mtime_ns), plan)
+
+
+class FrozenDict(dict):
+    """Read-only dict for config sections inside a plan"""
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Migration plan is read-only")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+class FrozenList(list):
+    """Read-only list for config sections inside a plan"""
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Migration plan is read-only")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _read_only
+    append = extend = insert = remove = pop = clear = sort = reverse = _read_only
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+
+def freeze(value):
+    """Deep read-only copy of a parsed YAML value"""
+    if isinstance(value, dict):
+        return FrozenDict((key, freeze(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return FrozenList(freeze(item) for item in value)
+    return value
+
+
+def get_key_columns(config, module):
+    """Delta key columns for a module as a list (single or composite key)"""
+    key = config["delta_settings"]["key_columns"][module]
+    return [key] if isinstance(key, str) else list(key)
+
+
+def get_duplicate_policy(config, module):
+    """Duplicate key policy for a module: first, last or error"""
+    policy = config["delta_settings"].get("duplicate_policy", "first")
+    if isinstance(policy, dict):
+        policy = policy.get(module, "first")
+    if policy not in ("first", "last", "error"):
+        raise ValueError(f"Invalid duplicate_policy for {module}: {policy}")
+    return policy
+
+
+def check_config(config):
+    """Structural checks shared by config validation and loading"""
+    for key in REQUIRED_KEYS:
+        if key not in config:
+            raise ValueError(f"Missing required key: {key}")
+
+    for module in config['modules']:
+        if module not in config['field_mappings']:
+            raise ValueError(f"Missing field_mappings for {module}")
+        if module not in config['validation_rules']:
+            raise ValueError(f"Missing validation_rules for {module}")
+        if module not in config['delta_settings'].get('key_columns', {}):
+            raise ValueError(f"Missing delta_settings.key_columns for {module}")
+    
+    for module, steps in (config.get('transforms') or {}).items():
+        for index, step in enumerate(steps or []):
+            if not isinstance(step, dict) or step.get('op') not in TRANSFORM_OPS:
+                raise ValueError(f"Invalid transform for {module} (step {index}): {step}")
+            missing = [key for key in TRANSFORM_OPS[step['op']] if not step.get(key)]
+            if missing:
+                raise ValueError(
+                    f"Transform {step['op']} for {module} (step {index}) is missing: {', '.join(missing)}"
+                )
+            if 'fields' in TRANSFORM_OPS[step['op']] and not isinstance(step['fields'], list):
+                raise ValueError(f"Transform {step['op']} for {module} (step {index}): fields must be a list")
+
+
+class ModulePlan:
+    """Lookups for one module, computed once per plan"""
+    def __init__(self, module, config):
+        self.module = module
+        self.field_map = config["field_mappings"].get(module, FrozenDict())
+        self.source_columns = FrozenDict((v, k) for k, v in self.field_map.items())
+        self.validation_rules = config["validation_rules"].get(module, FrozenDict())
+        self.value_maps = self.validation_rules.get("value_maps", FrozenDict())
+        self.allowed_values = FrozenDict(
+            (field, frozenset(mapping.values())) for field, mapping in self.value_maps.items()
+        )
+        self.transform_spec = (config.get("transforms") or {}).get(module)
+        self.key_columns = tuple(get_key_columns(config, module))
+        self.duplicate_policy = get_duplicate_policy(config, module)
+
+    def source_column(self, yardi_field, default):
+        """Source column mapped to a Yardi field"""
+        return self.source_columns.get(yardi_field, default)
+
+    @cached_property
+    def transforms(self):
+        """Transform spec compiled to column operations: step(df) -> df"""
+        from .transformation import compile_transforms  # Needs pandas - compile on first use
+        return tuple(compile_transforms(self))
+
+    @cached_property
+    def rules(self):
+        """Validation checks compiled to closures: check(df, report)"""
+        from .validation import compile_rules  # Needs pandas - compile on first use
+        return tuple(compile_rules(self))
+
+
+class MigrationPlan(Mapping):
+    """Validated, read-only config with per-module lookups and a content hash"""
+    def __init__(self, config, source=None):
+        if not isinstance(config, Mapping):
+            raise ValueError("Config must be a mapping")
+        config = dict(config)
+        config.setdefault('delta_settings', DEFAULT_DELTA_SETTINGS)
+        check_config(config)
+
+        self._config = freeze(config)
+        self.source = source
+        self.config_hash = hashlib.sha256(
+            json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        self.module_plans = FrozenDict(
+            (module, ModulePlan(module, self._config)) for module in self._config['modules']
+        )
+
+    def __getitem__(self, key):
+        return self._config[key]
+
+    def __iter__(self):
+        return iter(self._config)
+
+    def __len__(self):
+        return len(self._config)
+
+    def __repr__(self):
+        return f"MigrationPlan({self.get('phase')!r}, hash={self.config_hash})"
+
+
+def get_module_plan(config, module):
+    """Compiled lookups for a module; raw dict configs are compiled on the fly"""
+    if not isinstance(config, MigrationPlan):
+        config = MigrationPlan(config)
+    if module in config.module_plans:
+        return config.module_plans[module]
+    return ModulePlan(module, config)
+
+
+def load_plan(file_path):
+    """Compiled plan for a config file, cached until the file changes"""
+    stat = os.stat(file_path)
+    signature = (stat.st_size, stat.st_mtime_ns)
+    cache_key = os.path.abspath(file_path)
+    cached = _PLAN_CACHE.get(cache_key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(file_path) as f:
+        plan = MigrationPlan(yaml.safe_load(f), file_path)
+    _PLAN_CACHE[cache_key] = (signature, plan)
+    return plan
+
+
+def release_plan(plan):
+    """Drop a plan (and any credentials it holds) from the cache"""
+    for cache_key, (_, cached) in list(_PLAN_CACHE.items()):
+        if cached is plan:
+            del _PLAN_CACHE[cache_key]
@@ -1,43 +1,39 @@
-import yaml
-import pandas as pd
 import os
 import traceback
 from datetime import datetime
-from .extraction import extract_data
-from .transformation import transform_data
-from .validation import validate_data
-from .yardi_loader import generate_yardi_files
-from .id_management import track_temp_ids
-from .delta_processor import get_delta_records
 from .rollback import create_rollback_point, execute_rollback
-from .reconciliation import generate_reconciliation_report
-from multiprocessing import Pool
+from .run_manifest import file_fingerprint, record_module_run
+from .migration_plan import MigrationPlan, load_plan, release_plan
+from .report_writer import ERROR_LOG, append_log, flush_reports
+from .benchmarks import timed_stage
 import shutil
 import sys
-from .utils import (
-    pre_migration_validation, 
-    archive_production_files,
-    finalize_production_migration, 
-    notify_production_support,
-    log_production_error, 
-    log_critical_error
-)
 
+# Stage modules (pandas, numpy, chardet) are imported inside each phase so
+# that entry points and status checks start without loading them.
 
 
-def execute_dm1_phase():
+def execute_dm1_phase(frames=None):
     """End-to-end workflow controller"""
     try:
         # 1. Load configuration
         config = load_config("config/dm1_crp.yaml")
         print(f"Loaded config for {config['phase']} phase")
         
+        from .extraction import extract_data
+        from .transformation import transform_data
+        from .validation import validate_data, save_validation_report
+        from .loader_backends import load_records
+        from .id_management import track_temp_ids
+        from .stage_cache import cached_stage
+        
         # Create output directories
         os.makedirs("data/yardi_etl/dm1_crp", exist_ok=True)
         os.makedirs("data/reports", exist_ok=True)
         
-        # Clear error log
-        open("data/reports/error_log.txt", "w").close()
+        # Clear error log (after any queued lines from an earlier phase land)
+        flush_reports()
+        open(ERROR_LOG, "w").close()
         
         # 2. Process each module
         for module in config["modules"]:
@@ -47,74 +43,69 @@ def execute_dm1_phase():
             
             try:
                 # 3. EXTRACTION - Get data from legacy systems
-                raw_df = extract_data(module, config)
+                source_file = f"data/sources/{config['phase']}/{module}.csv"
+                raw_df, raw_key = cached_stage(
+                    "extract", module, config, [file_fingerprint(source_file)],
+                    lambda: timed_stage("extract_data", module, config,
+                                        lambda: extract_data(module, config, frames))
+                )
                 print(f"  Extracted {len(raw_df)} records")
                 print(f"  Source columns: {list(raw_df.columns)}")
                 
                 # 4. TRANSFORMATION - Convert to Yardi format
-                transformed_df = transform_data(raw_df, module, config)
+                transformed_df, transform_key = cached_stage(
+                    "transform", module, config, [raw_key],
+                    lambda: transform_data(raw_df, module, config)
+                )
                 print(f"  Transformed data")
                 
                 # 5. Track temporary IDs
                 track_temp_ids(transformed_df, module, config['phase'])
                 
                 # 6. VALIDATION - Quality checks
-                validation_report = validate_data(transformed_df, module, config)
+                validation_report, _ = cached_stage(
+                    "validate", module, config, [transform_key],
+                    lambda: timed_stage("validate_data", module, config,
+                                        lambda: validate_data(transformed_df, module, config, save=False))
+                )
+                save_validation_report(validation_report)  # Also on cache hits
                 
                 if validation_report["status"] == "FAIL":
                     print(f"  Validation FAILED: {len(validation_report['errors'])} critical errors")
+                    record_module_run(config['phase'], module, "validation_failed", [source_file], len(transformed_df))
                     # Skip loading for failed modules
                     continue
                 
                 # 7. LOADING - Generate Yardi-ready files
-                generate_yardi_files(transformed_df, module, "dm1_crp")
+                load_records(transformed_df, module, "dm1_crp", config)
                 print(f"  Generated Yardi ETL files")
+                record_module_run(config['phase'], module, "loaded", [source_file], len(transformed_df))
                 
             except Exception as e:
+                record_module_run(config['phase'], module, "error")
                 print(f"  Module processing failed: {str(e)}")
                 # Log detailed traceback
-                with open("data/reports/error_log.txt", "a") as f:
-                    f.write(f"\n[{datetime.now()}] {module} module error:\n")
-                    f.write(traceback.format_exc())
+                append_log(ERROR_LOG, f"\n[{datetime.now()}] {module} module error:\n"
+                                      + traceback.format_exc())
                 print(f"  See data/reports/error_log.txt for details")
         
+        flush_reports()
         print("\nDM1 Phase Complete! Check reports in data/reports")
         
     except Exception as e:
         print(f"Critical error: {str(e)}")
-        with open("data/reports/error_log.txt", "a") as f:
-            f.write(f"\n[{datetime.now()}] GLOBAL ERROR:\n")
-            f.write(traceback.format_exc())
+        append_log(ERROR_LOG, f"\n[{datetime.now()}] GLOBAL ERROR:\n" + traceback.format_exc())
+        flush_reports()
 
 def load_config(file_path):
-    """Robust configuration loading with validation"""
+    """Load the compiled, read-only migration plan with a safe fallback"""
     try:
-        with open(file_path) as f:
-            config = yaml.safe_load(f)
-            
-        # Validate critical sections
-        required_sections = ['modules', 'field_mappings', 'validation_rules']
-        for section in required_sections:
-            if section not in config:
-                raise ValueError(f"Missing required section: {section}")
-                
-        # Add default delta settings if missing
-        if 'delta_settings' not in config:
-            config['delta_settings'] = {
-                'reference_phase': 'dm1_crp',
-                'key_columns': {
-                    'leasing': 'lease_ref',
-                    'ar': 'invoice_number',
-                    'fixed_assets': 'asset_id'
-                }
-            }
-            
-        return config
+        return load_plan(file_path)
         
     except Exception as e:
         print(f"FATAL: Config load failed: {str(e)}")
         # Create minimal safe config
-        return {
+        return MigrationPlan({
             'phase': 'fallback',
             'modules': [],
             'field_mappings': {},
@@ -123,9 +114,9 @@ def load_config(file_path):
                 'reference_phase': 'none',
                 'key_columns': {}
             }
-        }
+        })
     
-def execute_dm2_phase():
+def execute_dm2_phase(frames=None):
     """End-to-end DM2 workflow with enhanced safety"""
     backup_path = None
     config = None
@@ -148,43 +139,9 @@ def execute_dm2_phase():
             print("WARNING: No modules configured - skipping processing")
         else:
             for module in config['modules']:
-                print(f"\n{'='*40}")
-                print(f"Processing {module.upper()} module")
-                print(f"{'='*40}")
-                
-                try:
-                    # Get delta records
-                    delta_df = get_delta_records(module, config)
-                    print(f"  Processing {len(delta_df)} delta records")
-                    
-                    # Transformation
-                    transformed_df = transform_data(delta_df, module, config)
-                    
-                    # Validation
-                    validation_report = validate_data(transformed_df, module, config)
-                    
-                    if validation_report["status"] == "FAIL":
-                        print(f"  Validation FAILED: {len(validation_report['errors'])} errors")
-                        continue
-                    
-                    # Generate Yardi files (incremental folder)
-                    generate_yardi_files(transformed_df, module, "dm2_uat/incremental")
-                    print(f"  Generated Yardi ETL files")
-                    
-                    # Post-load reconciliation
-                    recon_report = generate_reconciliation_report(module, config)
-                    if recon_report:
-                      print(f"  Generated reconciliation report")
-                    else:
-                      print(f"  Reconciliation report failed")
-                    
-                except Exception as e:
-                    print(f"  Module processing failed: {str(e)}")
-                    # Log error
-                    with open("data/reports/error_log.txt", "a") as f:
-                        f.write(f"\n[{datetime.now()}] {module} module error:\n")
-                        f.write(traceback.format_exc())
+                process_dm2_module(module, config, frames)
         
+        flush_reports()
         print("\nDM2 UAT Complete! Reconciliation reports available in data/reconciliation")
         
     except Exception as e:
@@ -200,16 +157,84 @@ def execute_dm2_phase():
             print("Rollback not possible: No backup point created")
         
         # Log full error
-        with open("data/reports/error_log.txt", "a") as f:
-            f.write(f"\n[{datetime.now()}] GLOBAL ERROR:\n")
-            f.write(tb)
+        append_log(ERROR_LOG, f"\n[{datetime.now()}] GLOBAL ERROR:\n" + tb)
+        flush_reports()
             
     finally:
         # Cleanup resources if needed
         if config and config['phase'] == 'fallback':
             print("EMERGENCY: Migration aborted due to configuration failure")
 
-def execute_dm3_phase():
+def process_dm2_module(module, config, frames=None):
+    """Delta -> transform -> validate -> load -> reconcile for one DM2 module"""
+    from .transformation import transform_data
+    from .validation import validate_data, save_validation_report
+    from .yardi_loader import generate_tombstone_file
+    from .loader_backends import load_records
+    from .delta_processor import get_delta_changes
+    from .reconciliation import generate_reconciliation_report
+    from .stage_cache import cached_stage
+    
+    print(f"\n{'='*40}")
+    print(f"Processing {module.upper()} module")
+    print(f"{'='*40}")
+    
+    try:
+        # Get delta records and keys deleted since DM1
+        ref_phase = config["delta_settings"]["reference_phase"]
+        delta_inputs = [f"data/sources/{config['phase']}/{module}.csv",
+                        f"data/sources/{ref_phase}/{module}.csv"]
+        (delta_df, deleted_df), delta_key = cached_stage(
+            "delta", module, config,
+            [file_fingerprint(path) for path in delta_inputs],
+            lambda: timed_stage("get_delta_records", module, config,
+                                lambda: get_delta_changes(module, config, frames))
+        )
+        print(f"  Processing {len(delta_df)} delta records, {len(deleted_df)} deletions")
+        
+        # Transformation
+        transformed_df, transform_key = cached_stage(
+            "transform", module, config, [delta_key],
+            lambda: transform_data(delta_df, module, config)
+        )
+        
+        # Validation
+        validation_report, _ = cached_stage(
+            "validate", module, config, [transform_key],
+            lambda: timed_stage("validate_data", module, config,
+                                lambda: validate_data(transformed_df, module, config, save=False))
+        )
+        save_validation_report(validation_report)  # Also on cache hits
+        
+        if validation_report["status"] == "FAIL":
+            print(f"  Validation FAILED: {len(validation_report['errors'])} errors")
+            record_module_run(config['phase'], module, "validation_failed", delta_inputs, len(delta_df))
+            return "validation_failed"
+        
+        # Generate Yardi files (incremental folder)
+        load_records(transformed_df, module, "dm2_uat/incremental", config)
+        print(f"  Generated Yardi ETL files")
+        if generate_tombstone_file(deleted_df, module, "dm2_uat/incremental", config):
+            print(f"  Generated tombstone file for {len(deleted_df)} deleted keys")
+        
+        # Post-load reconciliation
+        recon_report = timed_stage("generate_reconciliation_report", module, config,
+                                   lambda: generate_reconciliation_report(module, config))
+        if recon_report:
+          print(f"  Generated reconciliation report")
+        else:
+          print(f"  Reconciliation report failed")
+        record_module_run(config['phase'], module, "loaded", delta_inputs, len(delta_df))
+        return "loaded"
+        
+    except Exception as e:
+        record_module_run(config['phase'], module, "error")
+        print(f"  Module processing failed: {str(e)}")
+        # Log error
+        append_log(ERROR_LOG, f"\n[{datetime.now()}] {module} module error:\n" + traceback.format_exc())
+        return "error"
+
+def execute_dm3_phase(frames=None):
     """End-to-end DM3 Production Go-Live workflow"""
     backup_path = None
     config = None
@@ -229,6 +254,20 @@ def execute_dm3_phase():
         backup_path = create_rollback_point("dm3_prod")  # Removed is_production
         print(f"  Created PRODUCTION rollback point at {backup_path}")
         
+        from .transformation import transform_data
+        from .validation import validate_data, save_validation_report
+        from .yardi_loader import generate_tombstone_file
+        from .loader_backends import load_records
+        from .delta_processor import get_delta_changes
+        from .reconciliation import generate_reconciliation_report
+        from .stage_cache import cached_stage
+        from .utils import (
+            pre_migration_validation,
+            archive_production_files,
+            finalize_production_migration,
+            log_production_error
+        )
+        
         # 4. Final validation before migration
         print("\nRunning pre-migration validation...")
         if not pre_migration_validation(config):
@@ -241,15 +280,31 @@ def execute_dm3_phase():
             print(f"{'='*60}")
             
             try:
-                # 6. Get delta since UAT
-                delta_df = get_delta_records(module, config)
-                print(f"  Processing {len(delta_df)} production delta records")
+                # 6. Get delta and deletions since UAT
+                ref_phase = config["delta_settings"]["reference_phase"]
+                delta_inputs = [f"data/sources/{config['phase']}/{module}.csv",
+                                f"data/sources/{ref_phase}/{module}.csv"]
+                (delta_df, deleted_df), delta_key = cached_stage(
+                    "delta", module, config,
+                    [file_fingerprint(path) for path in delta_inputs],
+                    lambda: timed_stage("get_delta_records", module, config,
+                                        lambda: get_delta_changes(module, config, frames))
+                )
+                print(f"  Processing {len(delta_df)} production delta records, {len(deleted_df)} deletions")
                 
                 # 7. Transformation with production rules
-                transformed_df = transform_data(delta_df, module, config)  # Removed is_production
+                transformed_df, transform_key = cached_stage(
+                    "transform", module, config, [delta_key],
+                    lambda: transform_data(delta_df, module, config)
+                )
                 
                 # 8. Stricter production validation
-                validation_report = validate_data(transformed_df, module, config)  # Removed validation_level
+                validation_report, _ = cached_stage(
+                    "validate", module, config, [transform_key],
+                    lambda: timed_stage("validate_data", module, config,
+                                        lambda: validate_data(transformed_df, module, config, save=False))
+                )
+                save_validation_report(validation_report)  # Also on cache hits
                 
                 if validation_report["status"] != "PASS":
                     raise ValueError(
@@ -257,23 +312,29 @@ def execute_dm3_phase():
                     )
                 
                 # 9. Generate final Yardi files
-                generate_yardi_files(transformed_df, module, "dm3_prod/final")  # Removed environment
+                load_records(transformed_df, module, "dm3_prod/final", config)  # Removed environment
                 print(f"  Generated PRODUCTION Yardi ETL files")
+                if generate_tombstone_file(deleted_df, module, "dm3_prod/final", config):
+                    print(f"  Generated PRODUCTION tombstone file for {len(deleted_df)} deleted keys")
                 
                 # 10. Production reconciliation
-                recon_report = generate_reconciliation_report(module, config)  # Removed report_type
+                recon_report = timed_stage("generate_reconciliation_report", module, config,
+                                           lambda: generate_reconciliation_report(module, config))
                 print(f"  Generated PRODUCTION reconciliation report")
                 
                 # 11. Archive production files
                 archive_production_files(module, "dm3_prod/final", config)
+                record_module_run(config['phase'], module, "loaded", delta_inputs, len(delta_df))
                 
             except Exception as e:
+                record_module_run(config['phase'], module, "error")
                 log_production_error(module, e)
                 print(f"⛔ Critical error in {module} module: {str(e)}")
                 print("⚠️ Skipping module but continuing migration")
                 continue  # Continue with next module
         
         # 12. Final success procedures
+        flush_reports()
         finalize_production_migration(config)
         print("\n✅✅✅ PRODUCTION MIGRATION SUCCESSFUL! ✅✅✅")
         print("Reconciliation reports: data/reconciliation/production")
@@ -290,12 +351,34 @@ def execute_dm3_phase():
         else:
             print("❌ ROLLBACK NOT POSSIBLE: No backup created!")
         
+        from .utils import log_critical_error, notify_production_support
         log_critical_error("DM3", tb)
         notify_production_support(e, config)
+        flush_reports()
         sys.exit(1)  # Exit with error code
         
     finally:
         print("\nProduction migration process completed")
+
+PHASE_RUNNERS = {
+    "dm1_crp": execute_dm1_phase,
+    "dm2_uat": execute_dm2_phase,
+    "dm3_prod": execute_dm3_phase,
+}
+
+def execute_phase_sequence(phases):
+    """Run several phases in one process, reusing parsed sources as delta references"""
+    from .frame_registry import retain_phase_frames
+    
+    frames = {}
+    for phase in phases:
+        print(f"\n{'#'*60}")
+        print(f"REHEARSAL: {phase.upper()}")
+        print(f"{'#'*60}")
+        PHASE_RUNNERS[phase](frames=frames)
+        # Only this phase's sources can serve as the next phase's reference
+        retain_phase_frames(frames, phase)
+
 def cleanup_production_resources(config):
     """Clean up temporary production resources"""
     print("\nCleaning up production resources...")
@@ -309,9 +392,9 @@ def cleanup_production_resources(config):
             if os.path.exists(dir_path):
                 shutil.rmtree(dir_path)
                 
-        # Clear sensitive data from memory
+        # Clear sensitive data from memory (plans are read-only, so drop it from the cache)
         if 'yardi' in config and 'credentials' in config['yardi']:
-            config['yardi']['credentials'] = "REDACTED"
+            release_plan(config)
             
         print("  Cleanup completed")
     except Exception as e:
@@ -0,0 +1,161 @@
+import os
+import csv
+import mmap
+import codecs
+import shutil
+from .extraction import detect_encoding
+from .utils import get_key_columns
+from .staging import use_staging
+from .stage_cache import get_cache_settings
+from .status import format_size
+
+# Go/no-go checks that never parse a source: headers come from the first
+# line, row counts from a memory-mapped newline scan, and the disk space
+# requirement from size estimates of what the run will write.
+
+SCAN_BLOCK_BYTES = 64 * 2**20
+SAFETY_MARGIN = 1.25
+DELIMITERS = [",", "|", "\t", ";"]
+
+
+def read_header(file_path):
+    """Encoding, delimiter and column names from the first line only"""
+    encoding = detect_encoding(file_path)
+    with open(file_path, "r", encoding=encoding, errors="replace", newline="") as f:
+        line = f.readline().lstrip("\ufeff").rstrip("\r\n")
+    delimiter = max(DELIMITERS, key=line.count)
+    columns = next(csv.reader([line], delimiter=delimiter), [])
+    return {
+        "encoding": encoding,
+        "delimiter": delimiter,
+        "columns": [column.strip() for column in columns],
+    }
+
+
+def newline_bytes(file_path, encoding):
+    """Byte pattern of a line break in the file's encoding"""
+    if encoding == "utf-16":
+        with open(file_path, "rb") as f:
+            bom = f.read(2)
+        return b"\x00\n" if bom == codecs.BOM_UTF16_BE else b"\n\x00"
+    if encoding == "utf-16-le":
+        return b"\n\x00"
+    if encoding == "utf-16-be":
+        return b"\x00\n"
+    return b"\n"
+
+
+def count_rows(file_path, encoding):
+    """Data rows (excluding the header) from a memory-mapped newline scan
+
+    Quoted fields with embedded line breaks are counted as extra rows, so
+    treat the result as an upper bound.
+    """
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return 0
+
+    newline = newline_bytes(file_path, encoding)
+    lines = 0
+    with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Even block sizes keep UTF-16 code units from straddling blocks
+        for start in range(0, size, SCAN_BLOCK_BYTES):
+            lines += mm[start:start + SCAN_BLOCK_BYTES].count(newline)
+        if mm[size - len(newline):] != newline:
+            lines += 1  # Last line has no trailing break
+    return max(lines - 1, 0)
+
+
+def check_module(module, config):
+    """Schema check and output estimates for one module's source file"""
+    phase = config["phase"]
+    source_file = f"data/sources/{phase}/{module}.csv"
+    result = {"module": module, "source": source_file, "errors": [], "warnings": []}
+    if not os.path.exists(source_file):
+        result["errors"].append(f"Missing source file: {source_file}")
+        return result
+
+    header = read_header(source_file)
+    columns = header["columns"]
+    result.update(header)
+    result["rows"] = count_rows(source_file, header["encoding"])
+    result["bytes"] = os.path.getsize(source_file)
+
+    # Schema: every mapped and key column must be in the header
+    field_map = config["field_mappings"].get(module, {})
+    key_cols = get_key_columns(config, module)
+    missing_keys = [col for col in key_cols if col not in columns]
+    missing_mapped = [col for col in field_map if col not in columns and col not in key_cols]
+    duplicates = sorted({col for col in columns if columns.count(col) > 1})
+    if not columns or columns == [""]:
+        result["errors"].append("Empty header line")
+    if missing_keys:
+        result["errors"].append(f"Missing key column(s): {', '.join(missing_keys)}")
+    if missing_mapped:
+        result["errors"].append(f"Missing mapped column(s): {', '.join(missing_mapped)}")
+    if duplicates:
+        result["errors"].append(f"Duplicate column(s): {', '.join(duplicates)}")
+    if header["delimiter"] != ",":
+        result["errors"].append(f"Delimiter is {header['delimiter']!r} but sources are read as comma-separated")
+
+    # The delta reference must share the key columns
+    ref_phase = config.get("delta_settings", {}).get("reference_phase")
+    ref_file = f"data/sources/{ref_phase}/{module}.csv"
+    inputs = [source_file]
+    if ref_phase and os.path.exists(ref_file):
+        inputs.append(ref_file)
+        ref_columns = read_header(ref_file)["columns"]
+        missing_ref = [col for col in key_cols if col not in ref_columns]
+        if missing_ref:
+            result["errors"].append(f"Reference {ref_phase} missing key column(s): {', '.join(missing_ref)}")
+        elif set(ref_columns) != set(columns):
+            result["warnings"].append(f"Columns differ from {ref_phase}: every common key will count as changed")
+
+    # Size estimates: output keeps mapped columns only, written as UTF-16
+    # (2 bytes per char); backups copy the output; cached stages hold the
+    # extracted/delta and transformed frames; staging loads every input
+    text_bytes = result["bytes"] // 2 if header["encoding"].startswith("utf-16") else result["bytes"]
+    share = len([col for col in field_map if col in columns]) / len(columns) if columns else 1.0
+    result["output_bytes"] = int(text_bytes * share * 2)
+    result["backup_bytes"] = result["output_bytes"]
+    result["cache_bytes"] = int(text_bytes * share * 2) if get_cache_settings(config)["enabled"] else 0
+    result["staging_bytes"] = (
+        int(sum(os.path.getsize(path) for path in inputs) * 1.5) if use_staging(inputs, config) else 0
+    )
+    return result
+
+
+def run_preflight(config, disk_path="data"):
+    """Print per-module go/no-go and the computed disk requirement"""
+    print(f"  Preflight for {config['phase']} (headers and row counts only)...")
+    passed = True
+    required = 0
+
+    for module in config["modules"]:
+        result = check_module(module, config)
+        if result["errors"]:
+            passed = False
+            print(f"    ❌ {module}: {'; '.join(result['errors'])}")
+        else:
+            print(
+                f"    ✅ {module}: ~{result['rows']:,} rows, {format_size(result['bytes'])} "
+                f"({result['encoding']}, {result['delimiter']!r}), "
+                f"est. output {format_size(result['output_bytes'])}"
+            )
+        for warning in result["warnings"]:
+            print(f"    ⚠️  {module}: {warning}")
+        required += sum(result.get(field, 0) for field in
+                        ("output_bytes", "backup_bytes", "cache_bytes", "staging_bytes"))
+
+    required = int(required * SAFETY_MARGIN)
+    os.makedirs(disk_path, exist_ok=True)
+    free_space = shutil.disk_usage(disk_path).free
+    if free_space < required:
+        print(f"    ❌ Insufficient disk space on {disk_path}/: "
+              f"{format_size(free_space)} available, {format_size(required)} required")
+        passed = False
+    else:
+        print(f"    ✅ Disk space on {disk_path}/: {format_size(free_space)} available, "
+              f"{format_size(required)} required")
+
+    return passed
@@ -0,0 +1,207 @@
+import os
+import json
+import base64
+import numpy as np
+import pandas as pd
+from .run_manifest import file_fingerprint
+
+# Streaming column profiles built while sources are read. Every part is
+# mergeable - HyperLogLog registers take the max, counts add, min/max
+# combine - so chunked and sharded reads profile as if read in one piece.
+
+HLL_PRECISION = 12  # 4096 registers, ~1.6% standard error
+TOP_K_CAPACITY = 1000  # Values tracked per top-k column; exact below this
+PROFILE_DIR = "data/reports"
+
+
+def get_profiling_settings(config, module):
+    """Read profiling settings; top-k defaults to the source columns of value_maps"""
+    settings = config.get("profiling", {}) or {}
+    top_k_columns = (settings.get("top_k_columns") or {}).get(module)
+    if top_k_columns is None:
+        source_columns = {v: k for k, v in config["field_mappings"].get(module, {}).items()}
+        value_maps = config["validation_rules"].get(module, {}).get("value_maps", {})
+        top_k_columns = [source_columns[field] for field in value_maps if field in source_columns]
+    return {
+        "enabled": bool(settings.get("enabled", True)),
+        "top_k": int(settings.get("top_k", 5)),
+        "top_k_columns": list(top_k_columns),
+    }
+
+
+def _bit_length(values):
+    """Vectorized int.bit_length() for uint64 arrays"""
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = values >= (np.uint64(1) << np.uint64(shift))
+        length[mask] += shift
+        values[mask] >>= np.uint64(shift)
+    return length + (values > 0)
+
+
+def hll_add(registers, hashes):
+    """Fold 64-bit hashes into HyperLogLog registers in place"""
+    if len(hashes) == 0:
+        return
+    low_bits = 64 - HLL_PRECISION
+    index = (hashes >> np.uint64(low_bits)).astype(np.int64)
+    remainder = hashes & np.uint64((1 << low_bits) - 1)
+    rank = (low_bits + 1 - _bit_length(remainder)).astype(np.uint8)
+    np.maximum.at(registers, index, rank)
+
+
+def hll_count(registers):
+    """Distinct-count estimate from HyperLogLog registers"""
+    m = len(registers)
+    estimate = (0.7213 / (1 + 1.079 / m)) * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)  # Linear counting for small cardinalities
+    return int(round(estimate))
+
+
+def new_column_profile():
+    return {
+        "count": 0,
+        "nulls": 0,
+        "registers": np.zeros(2 ** HLL_PRECISION, dtype=np.uint8),
+        "numeric": True,
+        "min": None,
+        "max": None,
+        "top": None,
+    }
+
+
+def profile_column(values, top_k=False):
+    """Sketch of one column chunk"""
+    profile = new_column_profile()
+    profile["count"] = len(values)
+    text = values.astype(str).str.strip()
+    present = values.notna() & (text != "")
+    profile["nulls"] = int((~present).sum())
+    text = text[present]
+    if text.empty:
+        if top_k:
+            profile["top"] = {}
+        return profile
+
+    hll_add(profile["registers"], pd.util.hash_pandas_object(text, index=False).to_numpy())
+    numbers = pd.to_numeric(text, errors="coerce")
+    if numbers.notna().all():
+        profile["min"], profile["max"] = float(numbers.min()), float(numbers.max())
+    else:
+        profile["numeric"] = False
+        profile["min"], profile["max"] = text.min(), text.max()
+    if top_k:
+        profile["top"] = text.value_counts().to_dict()
+    return profile
+
+
+def merge_column_profiles(a, b):
+    """Combine two sketches of the same column"""
+    merged = new_column_profile()
+    merged["count"] = a["count"] + b["count"]
+    merged["nulls"] = a["nulls"] + b["nulls"]
+    merged["registers"] = np.maximum(a["registers"], b["registers"])
+    merged["numeric"] = a["numeric"] and b["numeric"]
+
+    bounds = [p for p in (a, b) if p["min"] is not None]
+    if bounds:
+        if not merged["numeric"]:
+            # Mixed numeric/text chunks compare as text
+            bounds = [{"min": _as_text(p["min"]), "max": _as_text(p["max"])} for p in bounds]
+        merged["min"] = min(p["min"] for p in bounds)
+        merged["max"] = max(p["max"] for p in bounds)
+
+    if a["top"] is not None or b["top"] is not None:
+        top = dict(a["top"] or {})
+        for value, count in (b["top"] or {}).items():
+            top[value] = top.get(value, 0) + count
+        if len(top) > TOP_K_CAPACITY:
+            top = dict(sorted(top.items(), key=lambda item: -item[1])[:TOP_K_CAPACITY])
+        merged["top"] = top
+    return merged
+
+
+def _as_text(value):
+    return f"{value:g}" if isinstance(value, float) else value
+
+
+def profile_frame(df, module, config, profile=None):
+    """Fold a chunk into a running per-column profile (None when profiling is off)"""
+    settings = get_profiling_settings(config, module)
+    if not settings["enabled"]:
+        return None
+    profile = {} if profile is None else profile
+    for column in df.columns:
+        chunk_profile = profile_column(df[column], column in settings["top_k_columns"])
+        profile[column] = (
+            merge_column_profiles(profile[column], chunk_profile) if column in profile else chunk_profile
+        )
+    return profile
+
+
+def profiled(chunks, module, config, profile):
+    """Pass chunks through while folding each into the profile"""
+    for chunk in chunks:
+        profile_frame(chunk, module, config, profile)
+        yield chunk
+
+
+def profile_path(module, phase):
+    return os.path.join(PROFILE_DIR, f"profile_{module}_{phase}.json")
+
+
+def write_profile(profile, module, phase, source_file):
+    """Save sketches (mergeable, including registers) next to the reports"""
+    if not profile:
+        return None
+    columns = {}
+    for column, sketch in profile.items():
+        columns[column] = dict(sketch, registers=base64.b64encode(sketch["registers"].tobytes()).decode("ascii"))
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(module, phase)
+    with open(path, "w") as f:
+        json.dump({"source": file_fingerprint(source_file), "columns": columns}, f, indent=2, default=str)
+    return path
+
+
+def read_profile(module, phase):
+    """Load the saved profile for a module, or None if missing or stale"""
+    path = profile_path(module, phase)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        saved = json.load(f)
+    if saved.get("source") != file_fingerprint(f"data/sources/{phase}/{module}.csv"):
+        return None
+
+    profile = {}
+    for column, sketch in saved["columns"].items():
+        registers = np.frombuffer(base64.b64decode(sketch["registers"]), dtype=np.uint8).copy()
+        profile[column] = dict(sketch, registers=registers)
+    return profile
+
+
+def profile_summary(profile, top_k=5):
+    """Report rows: column, rows, nulls, null %, distinct, min, max, top values"""
+    rows = []
+    for column in sorted(profile):
+        sketch = profile[column]
+        top = None
+        if sketch["top"] is not None:
+            ranked = sorted(sketch["top"].items(), key=lambda item: (-item[1], item[0]))[:top_k]
+            top = ", ".join(f"{value} ({count})" for value, count in ranked)
+        rows.append({
+            "column": column,
+            "rows": sketch["count"],
+            "nulls": sketch["nulls"],
+            "null_pct": 100.0 * sketch["nulls"] / sketch["count"] if sketch["count"] else 0.0,
+            "distinct": hll_count(sketch["registers"]),
+            "min": _as_text(sketch["min"]) if sketch["min"] is not None else "-",
+            "max": _as_text(sketch["max"]) if sketch["max"] is not None else "-",
+            "top": top,
+        })
+    return rows
@@ -1,51 +1,82 @@
 import os
+import io
 import pandas as pd
 import glob
+import chardet
 from datetime import datetime
+from .staging import use_staging, staged_reconciliation
+from .utils import get_key_columns, key_strings
+from .report_writer import submit_report
+from .migration_plan import get_module_plan
+from .transformation import transform_data
+from .canonical import canonical_values, column_kinds
+from .extraction import read_concurrently, get_read_workers
 
 def generate_reconciliation_report(module, config):
     """Robust reconciliation with key column mapping"""
     try:
         print(f"  Generating reconciliation report for {module}")
         
-        # 1. Get key column mapping
-        source_key = config["delta_settings"]["key_columns"][module]
-        yardi_key = config["field_mappings"][module].get(source_key, source_key)
+        # 1. Get key column mapping (single or composite)
+        source_keys = get_key_columns(config, module)
+        yardi_keys = [config["field_mappings"][module].get(key, key) for key in source_keys]
         
         # 2. Load source data
         source_file = f"data/sources/{config['phase']}/{module}.csv"
         if not os.path.exists(source_file):
             print(f"    Source file not found: {source_file}")
             return None
-            
-        source_df = pd.read_csv(source_file)
         
-        # 3. Load Yardi data
-        yardi_files = glob.glob(f"data/yardi_etl/{config['phase']}/incremental/{module}_*.csv")
+        # Sorted oldest first, so the last row of a key is its newest load
+        yardi_files = sorted(glob.glob(f"data/yardi_etl/{config['phase']}/incremental/{module}_*.csv"))
         if not yardi_files:
             print(f"    No Yardi files found for {module}")
             return None
-            
-        yardi_dfs = []
-        for file in yardi_files:
+        
+        # Datasets too large for memory are reconciled inside the staging database
+        if use_staging([source_file] + yardi_files, config):
+            with open(source_file, 'rb') as f:
+                source_encoding = chardet.detect(f.read(10000))['encoding']
+            report = staged_reconciliation(
+                module, config, source_file, yardi_files, source_keys, yardi_keys, source_encoding
+            )
+            if report:
+                save_report(report, module, config)
+            return report
+        
+        # 3. Load source and Yardi data concurrently; incremental files are
+        # read as text into the mapped Yardi schema (plus unmapped key
+        # columns) and concatenated once
+        schema = list(dict.fromkeys(list(config["field_mappings"][module].values()) + yardi_keys))
+        
+        def read(file):
+            if file == source_file:
+                return pd.read_csv(file)
             try:
-                df = pd.read_csv(file, sep='|', encoding='utf-16')
-                yardi_dfs.append(df)
+                df = pd.read_csv(file, sep='|', encoding='utf-16', dtype=str)
+                return df.reindex(columns=schema)
             except Exception as e:
                 print(f"    Error reading {file}: {str(e)}")
+                return None
+        
+        parsed = read_concurrently(read, [source_file] + yardi_files, get_read_workers(config))
+        source_df = parsed[source_file]
+        yardi_dfs = [parsed[file] for file in yardi_files if parsed[file] is not None]
         
         if not yardi_dfs:
             print(f"    No valid Yardi files for {module}")
             return None
             
-        yardi_df = pd.concat(yardi_dfs)
+        yardi_df = pd.concat(yardi_dfs, ignore_index=True)
         
         # 4. Validate key columns exist
         key_errors = []
-        if source_key not in source_df.columns:
-            key_errors.append(f"Source key '{source_key}' missing in source data")
-        if yardi_key not in yardi_df.columns:
-            key_errors.append(f"Yardi key '{yardi_key}' missing in ETL data")
+        for source_key in source_keys:
+            if source_key not in source_df.columns:
+                key_errors.append(f"Source key '{source_key}' missing in source data")
+        for yardi_key in yardi_keys:
+            if yardi_key not in yardi_df.columns:
+                key_errors.append(f"Yardi key '{yardi_key}' missing in ETL data")
         
         if key_errors:
             print(f"    Key validation failed: {'; '.join(key_errors)}")
@@ -62,41 +93,48 @@ def generate_reconciliation_report(module, config):
         }
         
         # Find missing records
-        source_keys = set(source_df[source_key].astype(str))
-        yardi_keys = set(yardi_df[yardi_key].astype(str))
-        report["missing_in_yardi"] = list(source_keys - yardi_keys)
-        report["extra_in_yardi"] = list(yardi_keys - source_keys)
-        
-        # Find matching records for field comparison
-        common_keys = source_keys & yardi_keys
-        common_source = source_df[source_df[source_key].astype(str).isin(common_keys)]
-        common_yardi = yardi_df[yardi_df[yardi_key].astype(str).isin(common_keys)]
-        
-        # Compare critical fields
-        for field in config["validation_rules"][module]["required"]:
-            if field not in common_source.columns or field not in common_yardi.columns:
-                continue
-                
-            mismatches = []
-            for key in common_keys:
-                source_val = common_source[common_source[source_key].astype(str) == key][field].values
-                yardi_val = common_yardi[common_yardi[yardi_key].astype(str) == key][field].values
-                
-                if len(source_val) == 0 or len(yardi_val) == 0:
-                    continue
-                    
-                if str(source_val[0]) != str(yardi_val[0]):
-                    mismatches.append({
-                        "key": key,
-                        "source_value": source_val[0],
-                        "yardi_value": yardi_val[0]
-                    })
-            
-            if mismatches:
+        source_key_values = key_strings(source_df, source_keys)
+        yardi_key_values = key_strings(yardi_df, yardi_keys)
+        source_key_set = set(source_key_values)
+        yardi_key_set = set(yardi_key_values)
+        report["missing_in_yardi"] = list(source_key_set - yardi_key_set)
+        report["extra_in_yardi"] = list(yardi_key_set - source_key_set)
+        
+        # Compare critical fields: source rows go through the module's
+        # transforms so both sides are in Yardi form, then canonical values
+        # are compared so dtype differences (5000.0 vs "5000") do not count
+        common_keys = source_key_set & yardi_key_set
+        in_source = source_key_values.isin(common_keys).to_numpy()
+        in_yardi = yardi_key_values.isin(common_keys).to_numpy()
+        expected = transform_data(source_df[in_source].copy(), module, config)
+        expected.index = source_key_values[in_source].to_numpy()
+        actual = yardi_df[in_yardi].set_axis(yardi_key_values[in_yardi].to_numpy(), axis=0)
+        expected = expected[~expected.index.duplicated(keep="last")].sort_index()
+        actual = actual[~actual.index.duplicated(keep="last")].reindex(expected.index)
+        
+        kinds = column_kinds(get_module_plan(config, module), yardi=True)
+        report["fields_compared"] = [
+            field for field in config["validation_rules"][module]["required"]
+            if field in expected.columns and field in actual.columns
+        ]
+        for field in report["fields_compared"]:
+            differs = (
+                canonical_values(expected[field], kinds.get(field)).to_numpy()
+                != canonical_values(actual[field], kinds.get(field)).to_numpy()
+            )
+            if differs.any():
+                sample = expected.index[differs][:3]  # First 3 samples
                 report["field_discrepancies"].append({
                     "field": field,
-                    "mismatch_count": len(mismatches),
-                    "sample": mismatches[:3]  # First 3 samples
+                    "mismatch_count": int(differs.sum()),
+                    "sample": [
+                        {
+                            "key": key,
+                            "source_value": expected.at[key, field],
+                            "yardi_value": actual.at[key, field]
+                        }
+                        for key in sample
+                    ]
                 })
         
         # 6. Save report
@@ -108,79 +146,94 @@ def generate_reconciliation_report(module, config):
         return None
 
 def save_report(report, module, config):
-    """Save reconciliation report to markdown file"""
-    report_dir = "data/reconciliation"
-    os.makedirs(report_dir, exist_ok=True)
+    """Queue the markdown reconciliation report (rendered by the background writer)"""
+    generated = datetime.now()
+    filename = f"recon_{module}_{config['phase']}_{generated.strftime('%Y%m%d_%H%M%S')}.md"
+    filepath = os.path.join("data/reconciliation", filename)
     
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"recon_{module}_{config['phase']}_{timestamp}.md"
-    filepath = os.path.join(report_dir, filename)
+    reference_phase = config['delta_settings']['reference_phase'] if 'delta_settings' in config else None
+    submit_report(filepath, render_reconciliation_report, report, module, config['phase'],
+                  reference_phase, generated)
+    print(f"    Queued report: {filename}")
+    return filepath
+
+def render_reconciliation_report(report, module, phase, reference_phase, generated):
+    """Markdown for a reconciliation report"""
+    f = io.StringIO()
     
-    with open(filepath, 'w') as f:
-        # Report header
-        f.write(f"# RECONCILIATION REPORT: {module.upper()} MODULE\n\n")
-        f.write(f"**Migration Phase**: {config['phase'].upper()}\n")
-        f.write(f"**Generated**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        if 'delta_settings' in config:
-            f.write(f"**Reference Phase**: {config['delta_settings']['reference_phase']}\n\n")
-        
-        # Record count summary
-        f.write("## Record Count Summary\n")
-        f.write("| System | Record Count |\n")
-        f.write("|--------|--------------|\n")
-        f.write(f"| Source | {report['total_source']} |\n")
-        f.write(f"| Yardi | {report['total_yardi']} |\n")
-        discrepancy = report['total_source'] - report['total_yardi']
-        f.write(f"| **Discrepancy** | **{discrepancy}** |\n\n")
-        
-        # Missing records
-        if report['missing_in_yardi']:
-            f.write("## Missing in Yardi\n")
-            f.write("| Key |\n")
-            f.write("|-----|\n")
-            for key in report['missing_in_yardi'][:10]:  # First 10
-                f.write(f"| {key} |\n")
-            if len(report['missing_in_yardi']) > 10:
-                f.write(f"| ... ({len(report['missing_in_yardi'])-10} more) |\n")
-        else:
-            f.write("## Missing in Yardi: None\n")
-        
-        # Extra records
-        if report['extra_in_yardi']:
-            f.write("\n## Extra in Yardi\n")
-            f.write("| Key |\n")
-            f.write("|-----|\n")
-            for key in report['extra_in_yardi'][:10]:
-                f.write(f"| {key} |\n")
-            if len(report['extra_in_yardi']) > 10:
-                f.write(f"| ... ({len(report['extra_in_yardi'])-10} more) |\n")
-        else:
-            f.write("\n## Extra in Yardi: None\n")
-        
-        # Field discrepancies
-        if report['field_discrepancies']:
-            f.write("\n## Field Discrepancies\n")
-            for item in report['field_discrepancies']:
-                f.write(f"### {item['field']}\n")
-                f.write(f"- Mismatch Count: {item['mismatch_count']}\n")
+    # Report header
+    f.write(f"# RECONCILIATION REPORT: {module.upper()} MODULE\n\n")
+    f.write(f"**Migration Phase**: {phase.upper()}\n")
+    f.write(f"**Generated**: {generated.strftime('%Y-%m-%d %H:%M:%S')}\n")
+    if reference_phase is not None:
+        f.write(f"**Reference Phase**: {reference_phase}\n\n")
+    
+    # Record count summary
+    f.write("## Record Count Summary\n")
+    f.write("| System | Record Count |\n")
+    f.write("|--------|--------------|\n")
+    f.write(f"| Source | {report['total_source']} |\n")
+    f.write(f"| Yardi | {report['total_yardi']} |\n")
+    discrepancy = report['total_source'] - report['total_yardi']
+    f.write(f"| **Discrepancy** | **{discrepancy}** |\n\n")
+    
+    # Missing records
+    if report['missing_in_yardi']:
+        f.write("## Missing in Yardi\n")
+        f.write("| Key |\n")
+        f.write("|-----|\n")
+        for key in report['missing_in_yardi'][:10]:  # First 10
+            f.write(f"| {key} |\n")
+        if len(report['missing_in_yardi']) > 10:
+            f.write(f"| ... ({len(report['missing_in_yardi'])-10} more) |\n")
+    else:
+        f.write("## Missing in Yardi: None\n")
+    
+    # Extra records
+    if report['extra_in_yardi']:
+        f.write("\n## Extra in Yardi\n")
+        f.write("| Key |\n")
+        f.write("|-----|\n")
+        for key in report['extra_in_yardi'][:10]:
+            f.write(f"| {key} |\n")
+        if len(report['extra_in_yardi']) > 10:
+            f.write(f"| ... ({len(report['extra_in_yardi'])-10} more) |\n")
+    else:
+        f.write("\n## Extra in Yardi: None\n")
+    
+    # Field discrepancies
+    if report['field_discrepancies']:
+        f.write("\n## Field Discrepancies\n")
+        for item in report['field_discrepancies']:
+            f.write(f"### {item['field']}\n")
+            f.write(f"- Mismatch Count: {item['mismatch_count']}\n")
+            
+            if item['mismatch_count'] > 0:
+                f.write("#### Sample Differences\n")
+                f.write("| Key | Source Value | Yardi Value |\n")
+                f.write("|-----|--------------|-------------|\n")
                 
-                if item['mismatch_count'] > 0:
-                    f.write("#### Sample Differences\n")
-                    f.write("| Key | Source Value | Yardi Value |\n")
-                    f.write("|-----|--------------|-------------|\n")
-                    
-                    for sample in item['sample']:
-                        f.write(f"| {sample['key']} | {sample['source_value']} | {sample['yardi_value']} |\n")
-        else:
-            f.write("\n## Field Discrepancies: None\n")
-        
-        # Recommendations
-        f.write("\n## Action Items\n")
-        f.write("- [ ] Investigate missing records\n")
-        f.write("- [ ] Review extra records\n")
-        if report['field_discrepancies']:
-            f.write("- [ ] Validate field mappings for discrepant fields\n")
-        f.write("- [ ] Obtain business sign-off\n")
+                for sample in item['sample']:
+                    f.write(f"| {sample['key']} | {sample['source_value']} | {sample['yardi_value']} |\n")
+    elif not report.get('fields_compared', True):
+        f.write("\n## Field Discrepancies: Not performed (no required field on both sides)\n")
+    else:
+        f.write("\n## Field Discrepancies: None\n")
+    
+    # Key integrity (staged reconciliation only)
+    if report.get('key_integrity'):
+        f.write("\n## Key Integrity\n")
+        f.write("| Check | Count |\n")
+        f.write("|-------|-------|\n")
+        for check, value in report['key_integrity'].items():
+            f.write(f"| {check.replace('_', ' ').title()} | {value} |\n")
+    
+    # Recommendations
+    f.write("\n## Action Items\n")
+    f.write("- [ ] Investigate missing records\n")
+    f.write("- [ ] Review extra records\n")
+    if report['field_discrepancies']:
+        f.write("- [ ] Validate field mappings for discrepant fields\n")
+    f.write("- [ ] Obtain business sign-off\n")
     
-    print(f"    Saved report: {filename}")
-    return filepath
\ No newline at end of file
+    return f.getvalue()
\ No newline at end of file
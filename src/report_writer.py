@@ -0,0 +1,101 @@
+import os
+import json
+import queue
+import atexit
+import threading
+
+# Background writer for reports and logs. Stages hand over report
+# structures and move on; a single thread renders markdown plus a JSON
+# sidecar and batches log appends. flush_reports() waits for everything
+# queued so far - call it at phase end, before backups or rollbacks read
+# the report folders, and on crash (atexit covers normal exits).
+
+ERROR_LOG = "data/reports/error_log.txt"
+
+_queue = queue.Queue()
+_thread = None
+_thread_lock = threading.Lock()
+
+
+def _ensure_thread():
+    global _thread
+    with _thread_lock:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_run, name="report-writer", daemon=True)
+            _thread.start()
+
+
+def _json_default(value):
+    # numpy scalars and timestamps from report structures
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def _process(jobs):
+    logs = {}  # path -> texts, one open per log file per batch
+    for kind, path, payload in jobs:
+        try:
+            if kind == "log":
+                logs.setdefault(path, []).append(payload)
+            else:
+                render, report, args = payload
+                _write_atomic(path, render(report, *args))
+                _write_atomic(
+                    f"{os.path.splitext(path)[0]}.json",
+                    json.dumps(report, indent=2, default=_json_default),
+                )
+        except Exception as e:
+            print(f"  Report writer failed for {path}: {str(e)}")
+
+    for path, texts in logs.items():
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a") as f:
+                f.write("".join(texts))
+        except Exception as e:
+            print(f"  Report writer failed for {path}: {str(e)}")
+
+
+def _run():
+    while True:
+        jobs = [_queue.get()]
+        # Drain whatever else is waiting so log appends are batched
+        while True:
+            try:
+                jobs.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            _process(jobs)
+        finally:
+            for _ in jobs:
+                _queue.task_done()
+
+
+def submit_report(path, render, report, *args):
+    """Queue a report: render(report, *args) to markdown plus a JSON sidecar"""
+    _ensure_thread()
+    _queue.put(("report", path, (render, report, args)))
+    return path
+
+
+def append_log(path, text):
+    """Queue text to append to a log file"""
+    _ensure_thread()
+    _queue.put(("log", path, text))
+
+
+def flush_reports():
+    """Block until every queued report and log line is on disk"""
+    if _thread is not None:
+        _queue.join()
+
+
+atexit.register(flush_reports)
@@ -2,9 +2,11 @@ import shutil
 import os
 from datetime import datetime
 import zipfile
+from .report_writer import flush_reports
 
 def create_rollback_point(phase):
     """Create backup of critical migration artifacts"""
+    flush_reports()  # Back up complete reports, not half-written ones
     backup_dir = f"data/backups/{phase}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     os.makedirs(backup_dir, exist_ok=True)
     
@@ -46,6 +48,7 @@ def create_rollback_point(phase):
 
 def execute_rollback(backup_dir):
     """Restore system to pre-migration state"""
+    flush_reports()  # Queued writes must not land after the restore
     print(f"Initiating rollback from {backup_dir}")
     
     # 1. Restore configuration
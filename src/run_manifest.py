@@ -0,0 +1,60 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+# Kept free of pandas so status checks start instantly
+MANIFEST_DIR = "data/reports"
+
+
+def file_fingerprint(file_path):
+    """Cheap fingerprint of a source file: path, size and modification time"""
+    if not os.path.exists(file_path):
+        return f"{file_path}:missing"
+    stat = os.stat(file_path)
+    return f"{file_path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def content_fingerprint(file_path, block_size=2**20):
+    """SHA-256 of a file's contents, streamed in blocks (None if missing)"""
+    if not os.path.exists(file_path):
+        return None
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(phase):
+    return os.path.join(MANIFEST_DIR, f"run_manifest_{phase}.json")
+
+
+def read_manifest(phase):
+    """Load the run manifest for a phase (empty if never run)"""
+    path = manifest_path(phase)
+    if not os.path.exists(path):
+        return {"phase": phase, "modules": {}}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"phase": phase, "modules": {}}
+
+
+def record_module_run(phase, module, status, inputs=None, records=None):
+    """Record the outcome of one module run and the source files it used"""
+    manifest = read_manifest(phase)
+    manifest["last_run"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    manifest["modules"][module] = {
+        "status": status,
+        "finished": manifest["last_run"],
+        "records": records,
+        "inputs": [file_fingerprint(path) for path in (inputs or [])],
+    }
+
+    os.makedirs(MANIFEST_DIR, exist_ok=True)
+    tmp_path = f"{manifest_path(phase)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path(phase))
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+# Streaming stratified sampling for representative (DM1 CRP) datasets.
+# Properties are chosen by smallest seeded hash, so every module picks the
+# same properties; rows within a property are kept by smallest random
+# priority, which is a reservoir sample that can be merged chunk by chunk.
+
+
+def get_sampling_settings(config, module):
+    """Read sampling targets for a module (None when sampling is off)"""
+    settings = config.get("sampling")
+    if not settings:
+        return None
+    return {
+        "properties": int(settings.get("properties", 5)),
+        "records_per_property": int(settings.get("records_per_property", 50)),
+        "seed": int(settings.get("seed", 42)),
+        "max_edge_cases": int(settings.get("max_edge_cases", 25)),
+        "edge_cases": (settings.get("edge_cases") or {}).get(module, []),
+    }
+
+
+def sampling_columns(config, module):
+    """Source columns the sampler needs in addition to the mapped ones"""
+    settings = get_sampling_settings(config, module)
+    if not settings:
+        return set()
+    columns = {"property_id"}
+    for rule in settings["edge_cases"]:
+        columns.update(rule[field] for field in ("column", "start", "end") if field in rule)
+    return columns
+
+
+def edge_case_mask(chunk, rule):
+    """Rows matching an edge-case rule"""
+    if rule["type"] == "missing":
+        if rule["column"] not in chunk.columns:
+            return pd.Series(False, index=chunk.index)
+        values = chunk[rule["column"]]
+        return values.isna() | (values.astype(str).str.strip() == "")
+
+    if rule["type"] == "invalid_range":
+        if rule["start"] not in chunk.columns or rule["end"] not in chunk.columns:
+            return pd.Series(False, index=chunk.index)
+        start = pd.to_datetime(chunk[rule["start"]], errors="coerce")
+        end = pd.to_datetime(chunk[rule["end"]], errors="coerce")
+        return start.notna() & end.notna() & (start >= end)
+
+    raise ValueError(f"Unknown edge case type: {rule['type']}")
+
+
+def stratified_sample(chunks, module, config):
+    """One streaming pass: N properties x M records each, plus edge cases"""
+    settings = get_sampling_settings(config, module)
+    allowed = config.get("properties")  # Optional allow-list
+    rng = np.random.default_rng(settings["seed"])
+    hash_key = str(settings["seed"]).zfill(16)[-16:]
+
+    property_hashes = {}  # Current N smallest property hashes
+    kept = None  # Per-property reservoirs
+    edges = [None] * len(settings["edge_cases"])  # Per-rule reservoirs
+    total_rows = 0
+
+    for chunk in chunks:
+        if chunk.empty or "property_id" not in chunk.columns:
+            continue
+        if allowed:
+            chunk = chunk[chunk["property_id"].isin(allowed)]
+
+        # Global row numbers keep source order and de-duplicate edge cases
+        chunk = chunk.assign(
+            _row=np.arange(total_rows, total_rows + len(chunk)),
+            _priority=rng.random(len(chunk)),
+        )
+        total_rows += len(chunk)
+
+        # 1. Property selection: keep the N smallest seeded hashes seen so far
+        ids = pd.Series(chunk["property_id"].dropna().astype(str).unique())
+        if not ids.empty:
+            hashes = pd.util.hash_pandas_object(ids, index=False, hash_key=hash_key)
+            property_hashes.update(zip(ids, hashes.to_numpy()))
+            property_hashes = dict(
+                sorted(property_hashes.items(), key=lambda item: item[1])[:settings["properties"]]
+            )
+
+        # 2. Reservoir per selected property: M smallest priorities
+        selected = chunk[chunk["property_id"].astype(str).isin(property_hashes)]
+        kept = selected if kept is None else pd.concat([kept, selected])
+        kept = kept[kept["property_id"].astype(str).isin(property_hashes)]
+        kept = (
+            kept.sort_values("_priority")
+            .groupby("property_id", sort=False)
+            .head(settings["records_per_property"])
+        )
+
+        # 3. Reservoir per edge-case rule, regardless of property
+        for i, rule in enumerate(settings["edge_cases"]):
+            matches = chunk[edge_case_mask(chunk, rule).to_numpy()]
+            combined = matches if edges[i] is None else pd.concat([edges[i], matches])
+            edges[i] = combined.nsmallest(settings["max_edge_cases"], "_priority")
+
+    parts = [part for part in [kept] + edges if part is not None]
+    if not parts:
+        return pd.DataFrame()
+
+    sample = pd.concat(parts).drop_duplicates("_row").sort_values("_row")
+    edge_count = len(sample) - (0 if kept is None else len(kept))
+    print(f"  Sampled {len(sample)} of {total_rows} records from "
+          f"{len(property_hashes)} properties ({edge_count} extra edge cases)")
+    return sample.drop(columns=["_row", "_priority"]).reset_index(drop=True)
@@ -0,0 +1,127 @@
+import os
+import json
+import pickle
+import hashlib
+from .extraction import get_source_columns
+from .utils import get_key_columns
+from .benchmarks import src_hash
+
+CACHE_DIR = "data/cache/stages"
+
+
+def get_cache_settings(config):
+    """Read stage cache settings with safe defaults (disabled unless configured)"""
+    settings = config.get("performance", {}).get("stage_cache", {}) or {}
+    return {
+        "enabled": bool(settings.get("enabled", False)),
+        "path": settings.get("path", CACHE_DIR),
+        "max_entries": int(settings.get("max_entries", 64)),
+        "max_bytes": int(settings.get("max_mb", 2048)) * 2**20,
+    }
+
+
+def stage_sections(stage, module, config):
+    """Only the config sections a stage actually reads"""
+    delta_settings = config["delta_settings"]
+    rules = config["validation_rules"].get(module, {})
+
+    if stage == "extract":
+        return {
+            "phase": config["phase"],
+            "properties": config.get("properties"),
+            "sampling": config.get("sampling"),
+            "columns": sorted(get_source_columns(module, config)),
+            "key_columns": get_key_columns(config, module),
+        }
+    if stage == "delta":
+        return {
+            "phase": config["phase"],
+            "reference_phase": delta_settings["reference_phase"],
+            "key_columns": get_key_columns(config, module),
+            "duplicate_policy": delta_settings.get("duplicate_policy", "first"),
+            # Change detection hashes canonical values of the mapped columns
+            "field_mappings": config["field_mappings"].get(module, {}),
+            "transforms": (config.get("transforms") or {}).get(module),
+        }
+    if stage == "transform":
+        return {
+            "field_mappings": config["field_mappings"].get(module, {}),
+            "value_maps": rules.get("value_maps", {}),
+            "transforms": (config.get("transforms") or {}).get(module),
+        }
+    if stage == "validate":
+        return {
+            "phase": config["phase"],
+            "validation_rules": rules,
+        }
+    raise ValueError(f"Unknown stage: {stage}")
+
+
+def stage_key(stage, module, config, inputs):
+    """Cache key from input fingerprints, the stage's config sections and the code version"""
+    payload = json.dumps(
+        {
+            "stage": stage,
+            "module": module,
+            "code": src_hash(),  # Results pickled by older code are not reused
+            "inputs": list(inputs),
+            "sections": stage_sections(stage, module, config),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def cached_stage(stage, module, config, inputs, compute):
+    """Return (result, key), recomputing only when inputs or config sections changed
+
+    The key doubles as the fingerprint of the result, so downstream stages
+    can pass it as their input without hashing the data again.
+    """
+    key = stage_key(stage, module, config, inputs)
+    settings = get_cache_settings(config)
+    if not settings["enabled"]:
+        return compute(), key
+
+    entry_path = os.path.join(settings["path"], f"{stage}_{module}_{key}.pkl")
+    if os.path.exists(entry_path):
+        try:
+            with open(entry_path, "rb") as f:
+                result = pickle.load(f)
+            os.utime(entry_path)  # Mark as recently used
+            print(f"  Reusing cached {stage} result")
+            return result, key
+        except Exception as e:
+            print(f"  Ignoring unreadable cache entry {entry_path}: {str(e)}")
+
+    result = compute()
+
+    try:
+        os.makedirs(settings["path"], exist_ok=True)
+        tmp_path = f"{entry_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, entry_path)
+        evict_entries(settings)
+    except Exception as e:
+        print(f"  Could not cache {stage} result: {str(e)}")
+
+    return result, key
+
+
+def evict_entries(settings):
+    """Drop least recently used entries beyond the count and size limits"""
+    cache_dir = settings["path"]
+    entries = []
+    for name in os.listdir(cache_dir):
+        if name.endswith(".pkl"):
+            stat = os.stat(os.path.join(cache_dir, name))
+            entries.append((stat.st_mtime_ns, stat.st_size, name))
+
+    entries.sort(reverse=True)  # Most recently used first
+    total = 0
+    for index, (_, size, name) in enumerate(entries):
+        total += size
+        if index >= settings["max_entries"] or total > settings["max_bytes"]:
+            os.remove(os.path.join(cache_dir, name))
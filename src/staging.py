@@ -0,0 +1,424 @@
+import os
+import csv
+import sqlite3
+import pandas as pd
+from .utils import get_key_columns, get_duplicate_policy
+from .migration_plan import get_module_plan
+from .canonical import canonical_hashes, canonical_values, column_kinds, hash_columns
+from .transformation import transform_data
+
+try:
+    import duckdb  # Optional: faster bulk loads and out-of-core joins
+except ImportError:
+    duckdb = None
+
+STAGING_DIR = "data/staging"
+LOAD_BATCH_ROWS = 50000
+FETCH_BATCH_ROWS = 50000
+
+# Rough in-memory size of a parsed CSV relative to its size on disk
+PANDAS_EXPANSION_FACTOR = 6
+
+
+def get_staging_settings(config):
+    """Read staging settings with safe defaults"""
+    settings = config.get("performance", {}).get("staging", {}) or {}
+    return {
+        "mode": settings.get("mode", "auto"),  # auto | always | never
+        "engine": settings.get("engine", "duckdb"),  # duckdb | sqlite
+        "memory_fraction": float(settings.get("memory_fraction", 0.5)),
+        "path": settings.get("path", STAGING_DIR),
+    }
+
+
+def total_memory_bytes():
+    """Physical memory of this host, or None if unknown"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def use_staging(file_paths, config):
+    """Decide whether datasets should be staged in the embedded database"""
+    settings = get_staging_settings(config)
+    if settings["mode"] == "never":
+        return False
+    if settings["mode"] == "always":
+        return True
+
+    memory = total_memory_bytes()
+    if not memory:
+        return False
+
+    on_disk = sum(os.path.getsize(p) for p in file_paths if os.path.exists(p))
+    estimated = on_disk * PANDAS_EXPANSION_FACTOR
+    return estimated > memory * settings["memory_fraction"]
+
+
+def open_staging_db(config):
+    """Open the phase staging database (DuckDB if installed, else SQLite)"""
+    settings = get_staging_settings(config)
+    os.makedirs(settings["path"], exist_ok=True)
+
+    if settings["engine"] == "duckdb" and duckdb is not None:
+        db_path = os.path.join(settings["path"], f"{config['phase']}.duckdb")
+        conn = duckdb.connect(db_path)
+        # Let large joins spill next to the database instead of failing
+        temp_dir = os.path.join(settings["path"], "tmp").replace("'", "''")
+        conn.execute(f"SET temp_directory='{temp_dir}'")
+        return conn
+
+    db_path = os.path.join(settings["path"], f"{config['phase']}.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA temp_store=FILE")
+    return conn
+
+
+def _is_duckdb(conn):
+    return duckdb is not None and isinstance(conn, duckdb.DuckDBPyConnection)
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _differs(conn, left, right):
+    """Null-safe inequality in the dialect of the connection"""
+    if _is_duckdb(conn):
+        return f"{left} IS DISTINCT FROM {right}"
+    return f"{left} IS NOT {right}"
+
+
+def _fetch_df(conn, sql, params=()):
+    if _is_duckdb(conn):
+        return conn.execute(sql, list(params)).df()
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def _fetch_column(conn, sql, params=()):
+    return [row[0] for row in conn.execute(sql, list(params)).fetchall()]
+
+
+def _table_columns(conn, table):
+    if _is_duckdb(conn):
+        rows = conn.execute(f"DESCRIBE {_quote(table)}").fetchall()
+    else:
+        rows = [(r[1],) for r in conn.execute(f"PRAGMA table_info({_quote(table)})").fetchall()]
+    return [r[0] for r in rows if r[0] != "_row"]
+
+
+def stage_csv(conn, table, file_path, encoding="utf-8", sep=","):
+    """Bulk-load a CSV file into a text-typed staging table"""
+    conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+
+    # DuckDB reads UTF-8 files natively and in parallel
+    if _is_duckdb(conn) and encoding and encoding.lower().replace("-", "") in ("utf8", "ascii", "utf8sig"):
+        conn.execute(
+            f"CREATE TABLE {_quote(table)} AS "
+            f"SELECT row_number() OVER () AS _row, * FROM read_csv(?, header=true, "
+            f"delim=?, all_varchar=true, null_padding=true)",
+            [file_path, sep]
+        )
+        return _table_columns(conn, table)
+
+    # Everything else is streamed through the csv module in batches
+    with open(file_path, "r", encoding=encoding, errors="replace", newline="") as f:
+        reader = csv.reader(f, delimiter=sep)
+        header = next(reader, [])
+        if not header:
+            conn.execute(f"CREATE TABLE {_quote(table)} (_row INTEGER)")
+            return []
+
+        expected_cols = len(header)
+        columns = ", ".join(f"{_quote(c)} TEXT" for c in header)
+        conn.execute(f"CREATE TABLE {_quote(table)} (_row INTEGER, {columns})")
+        placeholders = ", ".join(["?"] * (expected_cols + 1))
+        insert_sql = f"INSERT INTO {_quote(table)} VALUES ({placeholders})"
+
+        batch = []
+        for row_num, row in enumerate(reader):
+            # Same row repair as the robust reader; empty fields load as NULL
+            row = row[:expected_cols] + [""] * (expected_cols - len(row))
+            batch.append([row_num] + [v if v != "" else None for v in row])
+            if len(batch) >= LOAD_BATCH_ROWS:
+                conn.executemany(insert_sql, batch)
+                batch = []
+        if batch:
+            conn.executemany(insert_sql, batch)
+
+    if not _is_duckdb(conn):
+        conn.commit()
+    return header
+
+
+def _first_rows(table, key_cols, policy="first"):
+    """Subquery keeping one row per key according to the duplicate policy"""
+    q_table = _quote(table)
+    pick = "MAX" if policy == "last" else "MIN"
+    group_by = ", ".join(_quote(col) for col in key_cols)
+    return (
+        f"(SELECT * FROM {q_table} WHERE _row IN "
+        f"(SELECT {pick}(_row) FROM {q_table} GROUP BY {group_by}))"
+    )
+
+
+def _key_join(left, right, left_cols, right_cols=None):
+    """Join condition over single or composite keys"""
+    right_cols = right_cols or left_cols
+    return " AND ".join(
+        f"{left}.{_quote(l)} = {right}.{_quote(r)}" for l, r in zip(left_cols, right_cols)
+    )
+
+
+def _key_expr(alias, key_cols):
+    """Readable key expression, composite keys joined with '|'"""
+    parts = [f"COALESCE(CAST({alias}.{_quote(col)} AS VARCHAR), '')" for col in key_cols]
+    return parts[0] if len(parts) == 1 else " || '|' || ".join(parts)
+
+
+def _check_duplicates(conn, table, key_cols, policy, label):
+    """Report duplicate keys in a staged table, raising under the error policy"""
+    group_by = ", ".join(_quote(col) for col in key_cols)
+    dupes = conn.execute(
+        f"SELECT COUNT(*), COALESCE(SUM(n), 0) FROM (SELECT COUNT(*) AS n FROM {_quote(table)} "
+        f"GROUP BY {group_by} HAVING COUNT(*) > 1) d"
+    ).fetchone()
+    if dupes[0]:
+        message = f"{dupes[0]} duplicate keys ({dupes[1]} rows) on {'+'.join(key_cols)} in {label}"
+        if policy == "error":
+            raise ValueError(message)
+        print(f"  WARNING: {message} - keeping {policy} occurrence")
+
+
+def staged_delta_records(module, config, current_file, ref_file, current_encoding, ref_encoding):
+    """Set-based change detection for datasets larger than memory (delta, deleted keys)"""
+    key_cols = get_key_columns(config, module)
+    policy = get_duplicate_policy(config, module)
+    conn = open_staging_db(config)
+    cur_table, ref_table = f"current_{module}", f"reference_{module}"
+    try:
+        print(f"  Staging {module} sources in embedded database")
+        current_cols = stage_csv(conn, cur_table, current_file, current_encoding)
+        ref_cols = stage_csv(conn, ref_table, ref_file, ref_encoding)
+        for key_col in key_cols:
+            if key_col not in current_cols or key_col not in ref_cols:
+                raise KeyError(key_col)
+
+        ref_phase = config["delta_settings"]["reference_phase"]
+        _check_duplicates(conn, cur_table, key_cols, policy, f"{config['phase']} {module}")
+        _check_duplicates(conn, ref_table, key_cols, policy, f"{ref_phase} {module}")
+        current_rows = _first_rows(cur_table, key_cols, policy)
+        ref_rows = _first_rows(ref_table, key_cols, policy)
+        select_cols = ", ".join(f"c.{_quote(col)}" for col in current_cols)
+
+        # 1. New records: current keys absent from reference
+        new_df = _fetch_df(conn, (
+            f"SELECT {select_cols} FROM {current_rows} c "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {_quote(ref_table)} r "
+            f"WHERE {_key_join('r', 'c', key_cols)}) "
+            f"ORDER BY c._row"
+        ))
+
+        # Deleted keys: reference keys absent from current
+        ref_key_cols = ", ".join(f"r.{_quote(col)}" for col in key_cols)
+        deleted_df = _fetch_df(conn, (
+            f"SELECT {ref_key_cols} FROM {ref_rows} r "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {_quote(cur_table)} c "
+            f"WHERE {_key_join('c', 'r', key_cols)}) "
+            f"ORDER BY r._row"
+        ))
+
+        # 2. Candidate changes: common keys whose text differs in a mapped column.
+        # Schema drift in those columns makes every common key a candidate.
+        plan = get_module_plan(config, module)
+        hashed_cols = hash_columns(plan, current_cols)
+        drifted = hashed_cols != hash_columns(plan, ref_cols)
+        if not drifted:
+            differs = " OR ".join(
+                _differs(conn, f"c.{_quote(col)}", f"r.{_quote(col)}") for col in hashed_cols
+            )
+        else:
+            differs = "1 = 1"
+
+        conn.execute("DROP TABLE IF EXISTS candidate_keys")
+        conn.execute(
+            f"CREATE TEMP TABLE candidate_keys AS SELECT c._row AS cur_row, r._row AS ref_row "
+            f"FROM {current_rows} c JOIN {ref_rows} r ON {_key_join('c', 'r', key_cols)} "
+            f"WHERE {differs}"
+        )
+
+        # 3. Confirm candidates with the same canonical hashes used in memory, in
+        # batches. Text comparison over-reports (5000.00 vs 5000.0), these do not.
+        changed_parts = []
+        kinds = column_kinds(plan)
+        ref_select = ", ".join(f"r.{_quote(col)}" for col in hashed_cols)
+        offset = 0
+        while True:
+            cur_batch = _fetch_df(conn, (
+                f"SELECT {select_cols} FROM candidate_keys k "
+                f"JOIN {_quote(cur_table)} c ON c._row = k.cur_row "
+                f"ORDER BY k.cur_row LIMIT {FETCH_BATCH_ROWS} OFFSET {offset}"
+            ))
+            if cur_batch.empty:
+                break
+            if drifted:
+                changed_parts.append(cur_batch)
+            else:
+                ref_batch = _fetch_df(conn, (
+                    f"SELECT {ref_select} FROM candidate_keys k "
+                    f"JOIN {_quote(ref_table)} r ON r._row = k.ref_row "
+                    f"ORDER BY k.cur_row LIMIT {FETCH_BATCH_ROWS} OFFSET {offset}"
+                ))
+                changed = (
+                    canonical_hashes(cur_batch[hashed_cols], kinds).to_numpy()
+                    != canonical_hashes(ref_batch[hashed_cols], kinds).to_numpy()
+                )
+                changed_parts.append(cur_batch[changed])
+            offset += FETCH_BATCH_ROWS
+
+        return pd.concat([new_df] + changed_parts, ignore_index=True), deleted_df
+    finally:
+        conn.close()
+
+
+def staged_reconciliation(module, config, source_file, yardi_files, source_keys, yardi_keys,
+                          source_encoding="utf-8"):
+    """Set-based reconciliation report for datasets larger than memory"""
+    conn = open_staging_db(config)
+    src_table, yardi_table = f"recon_source_{module}", f"recon_yardi_{module}"
+    try:
+        print(f"    Staging {module} reconciliation data in embedded database")
+        source_cols = stage_csv(conn, src_table, source_file, encoding=source_encoding)
+
+        # Combine all incremental Yardi files into one table
+        yardi_cols = []
+        for i, file in enumerate(yardi_files):
+            part = f"{yardi_table}_{i}"
+            try:
+                cols = stage_csv(conn, part, file, encoding="utf-16", sep="|")
+            except Exception as e:
+                print(f"    Error reading {file}: {str(e)}")
+                continue
+            if not yardi_cols:
+                yardi_cols = cols
+                conn.execute(f"DROP TABLE IF EXISTS {_quote(yardi_table)}")
+                conn.execute(f"CREATE TABLE {_quote(yardi_table)} AS SELECT * FROM {_quote(part)} WHERE 1 = 0")
+            shared = [c for c in yardi_cols if c in cols]
+            col_list = ", ".join(_quote(c) for c in shared)
+            conn.execute(
+                f"INSERT INTO {_quote(yardi_table)} (_row, {col_list}) "
+                f"SELECT _row + {i} * 1000000000, {col_list} FROM {_quote(part)}"
+            )
+            conn.execute(f"DROP TABLE {_quote(part)}")
+
+        if not yardi_cols:
+            print(f"    No valid Yardi files for {module}")
+            return None
+
+        # 1. Validate key columns exist
+        key_errors = []
+        for source_key in source_keys:
+            if source_key not in source_cols:
+                key_errors.append(f"Source key '{source_key}' missing in source data")
+        for yardi_key in yardi_keys:
+            if yardi_key not in yardi_cols:
+                key_errors.append(f"Yardi key '{yardi_key}' missing in ETL data")
+        if key_errors:
+            print(f"    Key validation failed: {'; '.join(key_errors)}")
+            return None
+
+        q_src, q_yardi = _quote(src_table), _quote(yardi_table)
+        s_key, y_key = _key_expr("s", source_keys), _key_expr("y", yardi_keys)
+        s_group = ", ".join(f"s.{_quote(col)}" for col in source_keys)
+        y_group = ", ".join(f"y.{_quote(col)}" for col in yardi_keys)
+        s_null = " AND ".join(f"s.{_quote(col)} IS NULL" for col in source_keys)
+        y_null = " AND ".join(f"y.{_quote(col)} IS NULL" for col in yardi_keys)
+
+        def count(sql):
+            return conn.execute(sql).fetchone()[0]
+
+        report = {
+            "module": module,
+            "total_source": count(f"SELECT COUNT(*) FROM {q_src}"),
+            "total_yardi": count(f"SELECT COUNT(*) FROM {q_yardi}"),
+            "missing_in_yardi": _fetch_column(conn, (
+                f"SELECT DISTINCT {s_key} FROM {q_src} s WHERE NOT ({s_null}) "
+                f"EXCEPT SELECT {y_key} FROM {q_yardi} y"
+            )),
+            "extra_in_yardi": _fetch_column(conn, (
+                f"SELECT DISTINCT {y_key} FROM {q_yardi} y WHERE NOT ({y_null}) "
+                f"EXCEPT SELECT {s_key} FROM {q_src} s"
+            )),
+            "field_discrepancies": [],
+            "key_integrity": {
+                "source_duplicate_keys": count(
+                    f"SELECT COUNT(*) FROM (SELECT {s_group} FROM {q_src} s "
+                    f"GROUP BY {s_group} HAVING COUNT(*) > 1) d"
+                ),
+                "source_null_keys": count(f"SELECT COUNT(*) FROM {q_src} s WHERE {s_null}"),
+                "yardi_duplicate_keys": count(
+                    f"SELECT COUNT(*) FROM (SELECT {y_group} FROM {q_yardi} y "
+                    f"GROUP BY {y_group} HAVING COUNT(*) > 1) d"
+                ),
+                "yardi_null_keys": count(f"SELECT COUNT(*) FROM {q_yardi} y WHERE {y_null}"),
+            },
+        }
+
+        # 2. Compare critical fields like the in-memory path, on the last
+        # (newest) row of each common key: source rows go through the
+        # module's transforms in batches, then canonical values are compared
+        # against the staged Yardi columns (files are staged oldest first)
+        conn.execute("DROP TABLE IF EXISTS recon_pairs")
+        conn.execute(
+            f"CREATE TEMP TABLE recon_pairs AS SELECT {s_key} AS _key, s._row AS src_row, y._row AS yardi_row "
+            f"FROM {_first_rows(src_table, source_keys, 'last')} s "
+            f"JOIN {_first_rows(yardi_table, yardi_keys, 'last')} y ON {_key_join('s', 'y', source_keys, yardi_keys)}"
+        )
+        transformed_cols = transform_data(pd.DataFrame(columns=source_cols), module, config).columns
+        fields = [
+            f for f in config["validation_rules"][module]["required"]
+            if f in yardi_cols and f in transformed_cols
+        ]
+        report["fields_compared"] = fields
+        kinds = column_kinds(get_module_plan(config, module), yardi=True)
+        src_select = ", ".join(f"s.{_quote(col)}" for col in source_cols)
+        yardi_select = ", ".join(f"y.{_quote(field)}" for field in fields)
+        mismatches = {}
+        offset = 0
+        while fields:
+            source_batch = _fetch_df(conn, (
+                f"SELECT p._key, {src_select} FROM recon_pairs p JOIN {q_src} s ON s._row = p.src_row "
+                f"ORDER BY p._key LIMIT {FETCH_BATCH_ROWS} OFFSET {offset}"
+            ))
+            if source_batch.empty:
+                break
+            yardi_batch = _fetch_df(conn, (
+                f"SELECT {yardi_select} FROM recon_pairs p JOIN {q_yardi} y ON y._row = p.yardi_row "
+                f"ORDER BY p._key LIMIT {FETCH_BATCH_ROWS} OFFSET {offset}"
+            ))
+            keys = source_batch.pop("_key").to_numpy()
+            expected = transform_data(source_batch, module, config)
+            for field in fields:
+                differs = (
+                    canonical_values(expected[field], kinds.get(field)).to_numpy()
+                    != canonical_values(yardi_batch[field], kinds.get(field)).to_numpy()
+                )
+                if not differs.any():
+                    continue
+                item = mismatches.setdefault(field, {"field": field, "mismatch_count": 0, "sample": []})
+                item["mismatch_count"] += int(differs.sum())
+                for position in differs.nonzero()[0][:3 - len(item["sample"])]:
+                    item["sample"].append({
+                        "key": keys[position],
+                        "source_value": expected[field].iat[position],
+                        "yardi_value": yardi_batch[field].iat[position],
+                    })
+            offset += FETCH_BATCH_ROWS
+        report["field_discrepancies"] = [mismatches[field] for field in fields if field in mismatches]
+
+        return report
+    finally:
+        conn.close()
@@ -0,0 +1,111 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for the Yardi import endpoint, backed by SQLite, so the
+# HTTP loader backend can be exercised and timed without a live instance.
+#   POST /import/<module>   JSON array of records, X-Batch-Id header
+#   GET  /count/<module>    records received so far
+
+STANDIN_DB = "data/standin/yardi.sqlite"
+
+
+def open_standin_db(db_path):
+    """Open (or create) the stand-in database"""
+    os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS batches ("
+        "batch_id TEXT PRIMARY KEY, module TEXT, records INTEGER, payload TEXT, received TEXT)"
+    )
+    conn.commit()
+    return conn
+
+
+def make_handler(conn, failure_rate=0.0, latency_ms=0):
+    """Request handler bound to a database, with optional fault injection"""
+    lock = threading.Lock()
+
+    class StandinHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keep-alive, so clients can pool connections
+        disable_nagle_algorithm = True  # Headers and body are separate writes
+
+        def do_POST(self):
+            parts = self.path.strip("/").split("/")
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if len(parts) != 2 or parts[0] != "import":
+                return self.reply(404, {"error": f"Unknown path {self.path}"})
+
+            if latency_ms:
+                time.sleep(latency_ms / 1000)
+            if failure_rate and random.random() < failure_rate:
+                return self.reply(503, {"error": "Injected failure"})
+
+            try:
+                records = json.loads(body)
+            except ValueError as e:
+                return self.reply(400, {"error": f"Invalid JSON: {str(e)}"})
+
+            # Replacing by batch id makes retried batches idempotent
+            batch_id = self.headers.get("X-Batch-Id") or f"{parts[1]}/{time.time_ns()}"
+            with lock:
+                conn.execute(
+                    "INSERT OR REPLACE INTO batches VALUES (?, ?, ?, ?, ?)",
+                    (batch_id, parts[1], len(records), body.decode("utf-8"), datetime.now().isoformat()),
+                )
+                conn.commit()
+            self.reply(200, {"batch_id": batch_id, "records": len(records)})
+
+        def do_GET(self):
+            parts = self.path.strip("/").split("/")
+            if len(parts) != 2 or parts[0] != "count":
+                return self.reply(404, {"error": f"Unknown path {self.path}"})
+            with lock:
+                total = conn.execute(
+                    "SELECT COALESCE(SUM(records), 0) FROM batches WHERE module = ?", (parts[1],)
+                ).fetchone()[0]
+            self.reply(200, {"module": parts[1], "records": total})
+
+        def reply(self, status, payload):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # Keep the console readable under load
+
+    return StandinHandler
+
+
+def start_standin(host="127.0.0.1", port=8765, db_path=STANDIN_DB, failure_rate=0.0, latency_ms=0):
+    """Start the stand-in in a background thread and return the server"""
+    conn = open_standin_db(db_path)
+    server = ThreadingHTTPServer((host, port), make_handler(conn, failure_rate, latency_ms))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def serve_standin(host="127.0.0.1", port=8765, db_path=STANDIN_DB, failure_rate=0.0, latency_ms=0):
+    """Run the stand-in in the foreground until interrupted"""
+    server = start_standin(host, port, db_path, failure_rate, latency_ms)
+    print(f"Stand-in Yardi import service on http://{host}:{port} (database {db_path})")
+    print("Press Ctrl-C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nStand-in stopped")
+    finally:
+        server.shutdown()
+        server.server_close()
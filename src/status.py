@@ -0,0 +1,72 @@
+import os
+import yaml
+from .run_manifest import file_fingerprint, read_manifest
+
+# Plan/status reporting from file metadata only - never imports pandas
+
+PHASE_CONFIGS = {
+    "dm1_crp": "config/dm1_crp.yaml",
+    "dm2_uat": "config/dm2_uat.yaml",
+    "dm3_prod": "config/dm3_prod.yaml",
+}
+
+
+def format_size(num_bytes):
+    """Human-readable file size"""
+    for unit in ["B", "KB", "MB", "GB"]:
+        if num_bytes < 1024 or unit == "GB":
+            return f"{num_bytes:.0f} {unit}" if unit == "B" else f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+
+
+def phase_status(phase):
+    """Plan and last-run status for every module of a phase"""
+    with open(PHASE_CONFIGS[phase]) as f:
+        config = yaml.safe_load(f)
+
+    ref_phase = config.get("delta_settings", {}).get("reference_phase")
+    manifest = read_manifest(phase)
+    modules = []
+
+    for module in config.get("modules", []):
+        source_file = f"data/sources/{phase}/{module}.csv"
+        inputs = [source_file]
+        if ref_phase:
+            inputs.append(f"data/sources/{ref_phase}/{module}.csv")
+
+        last_run = manifest["modules"].get(module, {})
+        recorded = last_run.get("inputs") or []
+        if not recorded:
+            index_state = "none"
+        elif recorded == [file_fingerprint(path) for path in inputs]:
+            index_state = "current"
+        else:
+            index_state = "stale"
+
+        modules.append({
+            "module": module,
+            "source": source_file,
+            "size": os.path.getsize(source_file) if os.path.exists(source_file) else None,
+            "last_status": last_run.get("status", "never run"),
+            "finished": last_run.get("finished", "-"),
+            "index": index_state,
+        })
+
+    return {"phase": phase, "reference_phase": ref_phase, "modules": modules}
+
+
+def print_status(phases):
+    """Print which modules would run, their source sizes and last-run state"""
+    for phase in phases:
+        status = phase_status(phase)
+        reference = status["reference_phase"] or "none"
+        print(f"\n{phase.upper()} (reference: {reference})")
+        index_label = "Delta index" if status["reference_phase"] else "Inputs"
+        print(f"  {'Module':<14}{'Source size':>12}  {'Last status':<18}{'Finished':<21}{index_label}")
+
+        for item in status["modules"]:
+            size = format_size(item["size"]) if item["size"] is not None else "MISSING"
+            print(
+                f"  {item['module']:<14}{size:>12}  {item['last_status']:<18}"
+                f"{item['finished']:<21}{item['index']}"
+            )
@@ -1,92 +1,179 @@
 import pandas as pd
 import numpy as np
+from itertools import islice
+from .migration_plan import get_module_plan
+
+# Declarative transforms: each module's `transforms:` list (Yardi field
+# names) is compiled once per migration plan into column operations, then
+# field_mappings renames the columns. Ops:
+#   default_id  fill missing <field> with <prefix> + <from>   (TEMP-IDs)
+#   date        parse <fields> with input_format, write output_format;
+#               fix_range: [start, end] moves end to start + 1 year if start >= end;
+#               memo: false turns off the cross-chunk cache of parsed/formatted dates
+#   numeric     coerce <fields> to numbers (abs: true drops the sign)
+#   value_map   map <field> through validation_rules value_maps (or an inline map)
+
+DATE_INPUT_FORMAT = "%Y-%m-%d"
+DATE_OUTPUT_FORMAT = "%Y%m%d"  # Yardi date format
+DATE_MEMO_SIZE = 100000  # Distinct values remembered per format, across chunks and modules
+
+_DATE_MEMO = {}  # (kind, format) -> {value: parsed datetime64 or formatted text}
+_MISSING = object()
+
+# Used when a config has no transforms for a module; these reproduce the
+# original hand-written leasing and fixed asset transformations
+DEFAULT_TRANSFORMS = {
+    "leasing": [
+        {"op": "default_id", "field": "TenantID", "from": "LeaseReference", "prefix": "TEMP-"},
+        {"op": "date", "fields": ["LeaseCommencementDate", "LeaseExpirationDate"],
+         "fix_range": ["LeaseCommencementDate", "LeaseExpirationDate"]},
+        {"op": "value_map", "field": "RentFrequency"},
+        {"op": "numeric", "fields": ["BaseRent"], "abs": True},
+    ],
+    "fixed_assets": [
+        {"op": "value_map", "field": "DepreciationMethod"},
+        {"op": "numeric", "fields": ["OriginalCost"], "abs": True},
+    ],
+}
 
 def transform_data(df, module, config):
     """Convert data to Yardi-compatible format"""
-    # Apply module-specific transformations
-    if module == "leasing":
-        return transform_leasing(df, config)
-    elif module == "fixed_assets":
-        return transform_fixed_assets(df, config)
-    else:
-        # Generic transformation for other modules
-        field_map = config["field_mappings"].get(module, {})
-        return df.rename(columns=field_map)
+    plan = get_module_plan(config, module)
+    for step in plan.transforms:
+        df = step(df)
+    
+    # Apply final field mapping
+    return df.rename(columns=plan.field_map)
 
-def transform_leasing(df, config):
-    """Fixed leasing transformation with robust null handling"""
-    # Get source column names from configuration
-    field_map = config["field_mappings"]["leasing"]
-    source_columns = {v: k for k, v in field_map.items()}
+def compile_transforms(plan):
+    """Compile a module's transform spec into column operations"""
+    spec = plan.transform_spec
+    if spec is None:
+        spec = DEFAULT_TRANSFORMS.get(plan.module, [])
     
-    # 1. Handle missing tenant IDs - FIXED LOGIC
-    tenant_source = source_columns.get("TenantID", "tenant_id")
-    lease_ref_source = source_columns.get("LeaseReference", "lease_ref")
+    steps = []
+    for item in spec:
+        builder = TRANSFORM_BUILDERS.get(item.get("op"))
+        if builder is None:
+            raise ValueError(f"Unknown transform op for {plan.module}: {item.get('op')}")
+        steps.append(builder(plan, item))
+    return steps
+
+def source_column(plan, field):
+    """Source column for a Yardi field (or a source column named directly)"""
+    return plan.source_column(field, field)
+
+def default_id_step(plan, item):
+    """Fill missing IDs with a prefixed value from another column"""
+    target = source_column(plan, item["field"])
+    origin = source_column(plan, item["from"])
+    prefix = item.get("prefix", "TEMP-")
     
-    if tenant_source in df.columns and lease_ref_source in df.columns:
-        # Create mask for missing tenant IDs
-        missing_mask = df[tenant_source].isna()
-        
-        # Generate temporary IDs where tenant ID is missing
-        df.loc[missing_mask, tenant_source] = 'TEMP-' + df.loc[missing_mask, lease_ref_source].astype(str)
+    def step(df):
+        if target in df.columns and origin in df.columns:
+            missing_mask = df[target].isna()
+            df.loc[missing_mask, target] = prefix + df.loc[missing_mask, origin].astype(str)
+        return df
+    return step
+
+def _convert_distinct(kind, fmt, keys, convert, dtype, memo=True):
+    """Results for distinct keys; convert(positions) runs only on unremembered ones"""
+    if not memo:
+        return np.asarray(convert(np.arange(len(keys))), dtype=dtype)
     
-    # 2. Date handling
-    start_source = source_columns.get("LeaseCommencementDate", "lease_start")
-    end_source = source_columns.get("LeaseExpirationDate", "lease_end")
+    remembered = _DATE_MEMO.setdefault((kind, fmt), {})
+    found = [remembered.get(key, _MISSING) for key in keys]
+    pending = [i for i, value in enumerate(found) if value is _MISSING]
+    if pending:
+        for i, value in zip(pending, convert(np.array(pending))):
+            found[i] = remembered[keys[i]] = value
+        overflow = len(remembered) - DATE_MEMO_SIZE
+        if overflow > 0:
+            # Oldest entries go first (dicts keep insertion order)
+            for key in list(islice(remembered, overflow)):
+                del remembered[key]
+    return np.array(found, dtype=dtype)
+
+def parse_dates(values, input_format=DATE_INPUT_FORMAT, memo=True):
+    """pd.to_datetime(errors='coerce') that parses each distinct value once"""
+    codes, uniques = pd.factorize(values)
+    parsed = _convert_distinct(
+        "parse", input_format, list(uniques),
+        lambda positions: pd.to_datetime(
+            pd.Index(uniques.take(positions)), errors='coerce', format=input_format
+        ).to_numpy(dtype="datetime64[ns]"),
+        "datetime64[ns]", memo,
+    )
+    # Missing values have code -1, which picks the trailing NaT
+    parsed = np.append(parsed, np.datetime64("NaT", "ns"))
+    return pd.Series(parsed[codes], index=values.index, name=values.name)
+
+def format_dates(dates, output_format=DATE_OUTPUT_FORMAT, memo=True):
+    """dt.strftime() that formats each distinct date once (NaT stays missing)"""
+    codes, uniques = pd.factorize(dates)
+    uniques = pd.DatetimeIndex(uniques)
+    formatted = _convert_distinct(
+        "format", output_format, uniques.asi8.tolist(),
+        lambda positions: uniques.take(positions).strftime(output_format),
+        object, memo,
+    )
+    formatted = np.append(formatted, np.nan)
+    return pd.Series(formatted[codes], index=dates.index, name=dates.name)
+
+def date_step(plan, item):
+    """Parse and reformat date columns, optionally repairing inverted ranges"""
+    columns = [source_column(plan, field) for field in item["fields"]]
+    input_format = item.get("input_format", DATE_INPUT_FORMAT)
+    output_format = item.get("output_format", DATE_OUTPUT_FORMAT)
+    fix_range = [source_column(plan, field) for field in item.get("fix_range", [])]
+    memo = bool(item.get("memo", True))
     
-    if start_source in df.columns and end_source in df.columns:
-        # Convert to datetime with coerce
-        df[start_source] = pd.to_datetime(df[start_source], errors='coerce', format="%Y-%m-%d")
-        df[end_source] = pd.to_datetime(df[end_source], errors='coerce', format="%Y-%m-%d")
-        
-        # Create valid date mask
-        valid_dates = df[start_source].notna() & df[end_source].notna()
+    def step(df):
+        present = [col for col in columns if col in df.columns]
+        for col in present:
+            df[col] = parse_dates(df[col], input_format, memo)
         
-        # Use vectorized operation for date comparison
-        if valid_dates.any():
-            start_dates = df.loc[valid_dates, start_source]
-            end_dates = df.loc[valid_dates, end_source]
-            
-            # Find and fix invalid date ranges
-            invalid_mask = start_dates >= end_dates
-            df.loc[valid_dates, end_source] = df.loc[valid_dates, end_source].mask(
-                invalid_mask,
-                df.loc[valid_dates, start_source] + pd.DateOffset(years=1)
-            )
+        if len(fix_range) == 2 and all(col in present for col in fix_range):
+            start, end = df[fix_range[0]], df[fix_range[1]]
+            # NaT compares False, so missing dates are never "inverted"
+            invalid_mask = (start >= end).to_numpy()
+            if invalid_mask.any():
+                df.loc[invalid_mask, fix_range[1]] = start[invalid_mask] + pd.DateOffset(years=1)
         
-        # Format to Yardi's required string format
-        df[start_source] = df[start_source].dt.strftime('%Y%m%d')
-        df[end_source] = df[end_source].dt.strftime('%Y%m%d')
-    
-    # 3. Map frequency values
-    freq_source = source_columns.get("RentFrequency", "rent_freq")
-    if freq_source in df.columns:
-        freq_map = config["validation_rules"]["leasing"]["value_maps"]["RentFrequency"]
-        df[freq_source] = df[freq_source].map(freq_map)
-    
-    # 4. Fix negative rent values
-    rent_source = source_columns.get("BaseRent", "base_rent")
-    if rent_source in df.columns:
-        df[rent_source] = pd.to_numeric(df[rent_source], errors='coerce').abs()
-    
-    # 5. Apply final field mapping
-    return df.rename(columns=field_map)
+        for col in present:
+            df[col] = format_dates(df[col], output_format, memo)
+        return df
+    return step
 
-def transform_fixed_assets(df, config):
-    """Special handling for fixed assets data"""
-    field_map = config["field_mappings"]["fixed_assets"]
-    source_columns = {v: k for k, v in field_map.items()}
-    
-    # Map depreciation methods to codes
-    method_source = source_columns.get("DepreciationMethod", "depreciation_method")
-    if method_source in df.columns:
-        method_map = config["validation_rules"]["fixed_assets"]["value_maps"]["DepreciationMethod"]
-        df[method_source] = df[method_source].map(method_map)
+def numeric_step(plan, item):
+    """Coerce columns to numbers, optionally as absolute values"""
+    columns = [source_column(plan, field) for field in item["fields"]]
+    absolute = bool(item.get("abs", False))
     
-    # Convert negative costs to positive
-    cost_source = source_columns.get("OriginalCost", "original_cost")
-    if cost_source in df.columns:
-        df[cost_source] = pd.to_numeric(df[cost_source], errors='coerce').abs()
+    def step(df):
+        for col in columns:
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors='coerce')
+                df[col] = values.abs() if absolute else values
+        return df
+    return step
+
+def value_map_step(plan, item):
+    """Map codes through a value map"""
+    column = source_column(plan, item["field"])
+    mapping = item.get("map") or plan.value_maps.get(item["field"])
+    if mapping is None:
+        raise ValueError(f"No value_maps entry for {item['field']} in {plan.module}")
     
-    # Apply field mapping
-    return df.rename(columns=field_map)
\ No newline at end of file
+    def step(df):
+        if column in df.columns:
+            df[column] = df[column].map(mapping)
+        return df
+    return step
+
+TRANSFORM_BUILDERS = {
+    "default_id": default_id_step,
+    "date": date_step,
+    "numeric": numeric_step,
+    "value_map": value_map_step,
+}
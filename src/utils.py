@@ -1,60 +1,77 @@
-import hashlib
 import pandas as pd
 import os
-import shutil
-from datetime import datetime, timedelta
+from datetime import datetime
+from .migration_plan import get_key_columns, get_duplicate_policy  # Re-exported for stages
+from .report_writer import append_log
+from .canonical import canonical_frame
 
-def create_row_hash(row):
-    """Create stable hash for dataframe row"""
-    return hashlib.sha256(
-        pd.util.hash_pandas_object(row).to_numpy().tobytes()
-    ).hexdigest()
+def hash_keys(df, key_cols):
+    """Vectorized 64-bit hash of single or composite key values (trimmed text, nulls unified)"""
+    return pd.util.hash_pandas_object(canonical_frame(df[key_cols]), index=False)
+
+def key_strings(df, key_cols):
+    """Readable key values, composite keys joined with '|'"""
+    keys = df[key_cols[0]].astype(str)
+    for col in key_cols[1:]:
+        keys = keys + "|" + df[col].astype(str)
+    return keys
+
+def build_key_index(df, key_cols, policy="first", label="data"):
+    """Index rows by key hash, reporting duplicates and applying the duplicate policy"""
+    key_hash = hash_keys(df, key_cols)
+    duplicated = key_hash.duplicated(keep=False)
+    
+    if duplicated.any():
+        dupes = df.loc[duplicated.to_numpy(), key_cols]
+        dupe_counts = dupes.value_counts().reset_index(name="occurrences")
+        sample = ", ".join(key_strings(dupe_counts, key_cols).head(5))
+        message = (f"{len(dupe_counts)} duplicate keys ({int(duplicated.sum())} rows) "
+                   f"on {'+'.join(key_cols)} in {label}: {sample}")
+        if policy == "error":
+            raise ValueError(message)
+        print(f"  WARNING: {message} - keeping {policy} occurrence")
+        
+        keep = ~key_hash.duplicated(keep=policy).to_numpy()
+        df = df.loc[keep]
+        key_hash = key_hash[keep]
+    
+    return df.set_axis(key_hash.to_numpy(), axis=0)
 
 # Production-specific utilities
 
 def archive_production_files(module, source_dir, config):
-    """Archive production files with timestamp"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    archive_path = f"data/backups/production/{module}_{timestamp}"
+    """Archive production files by content into a timestamped folder"""
+    # Imported here: archive is only needed by DM3
+    from .archive import ARCHIVE_ROOT, archive_files
     
-    os.makedirs(archive_path, exist_ok=True)
+    # Phase-relative folders ("dm3_prod/final") live under the ETL output
+    if not os.path.isdir(source_dir):
+        source_dir = os.path.join("data/yardi_etl", source_dir)
     
-    # Copy ETL files
-    for file_name in os.listdir(source_dir):
-        if file_name.startswith(module):
-            shutil.copy(
-                os.path.join(source_dir, file_name),
-                os.path.join(archive_path, file_name)
-            )
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    archive_path = f"{ARCHIVE_ROOT}/{module}_{timestamp}"
+    
+    # ETL and tombstone files
+    file_paths = [
+        os.path.join(source_dir, file_name)
+        for file_name in sorted(os.listdir(source_dir))
+        if file_name.startswith(module) or file_name.startswith(f"tombstones_{module}_")
+    ]
+    manifest, stored = archive_files(file_paths, archive_path, source_dir)
     
-    print(f"  Archived production files to {archive_path}")
+    print(f"  Archived production files to {archive_path} "
+          f"({len(manifest['files'])} files, {stored} new)")
     return archive_path
 
 def pre_migration_validation(config):
     """Run final checks before production migration"""
-    checks_passed = True
-    
-    # 1. Verify all source files exist
-    print("  Checking source files...")
-    for module in config['modules']:
-        path = f"data/sources/dm3_prod/{module}.csv"
-        if not os.path.exists(path):
-            print(f"    ❌ Missing source file: {path}")
-            checks_passed = False
-        else:
-            print(f"    ✅ Found {module} source file")
+    # Imported here: preflight reads headers via extraction, which imports utils
+    from .preflight import run_preflight
     
-    # 2. Check available disk space
-    print("  Checking disk space...")
-    min_space = 2 * 10**9  # 2GB minimum
-    free_space = shutil.disk_usage("/").free
-    if free_space < min_space:
-        print(f"    ❌ Insufficient disk space: {free_space/(10**9):.2f}GB available, 2GB required")
-        checks_passed = False
-    else:
-        print(f"    ✅ Sufficient disk space: {free_space/(10**9):.2f}GB")
+    # 1. Source schemas, row counts and disk space from estimated output sizes
+    checks_passed = run_preflight(config)
     
-    # 3. Validate configuration
+    # 2. Validate configuration
     print("  Validating configuration...")
     if 'yardi' not in config or 'environment' not in config['yardi']:
         print("    ❌ Missing Yardi environment configuration")
@@ -76,14 +93,13 @@ def finalize_production_migration(config):
 
 def log_production_error(module, error):
     """Log module-specific production errors"""
-    with open("data/reports/production_errors.log", "a") as f:
-        f.write(f"[{datetime.now()}] {module} module error: {str(error)}\n")
+    append_log("data/reports/production_errors.log",
+               f"[{datetime.now()}] {module} module error: {str(error)}\n")
 
 def log_critical_error(phase, traceback):
     """Log critical phase errors"""
-    with open("data/reports/critical_errors.log", "a") as f:
-        f.write(f"\n[{datetime.now()}] {phase} PHASE FAILURE:\n")
-        f.write(traceback)
+    append_log("data/reports/critical_errors.log",
+               f"\n[{datetime.now()}] {phase} PHASE FAILURE:\n" + traceback)
 
 def notify_production_support(error, config):
     """Alert production support team"""
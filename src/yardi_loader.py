@@ -14,4 +14,25 @@ def generate_yardi_files(df, module, phase):
     # - Pipe delimiters
     # - UTF-16 encoding
     # - No index column
-    df.to_csv(filepath, sep="|", index=False, encoding="utf-16")
\ No newline at end of file
+    df.to_csv(filepath, sep="|", index=False, encoding="utf-16")
+
+def generate_tombstone_file(deleted_df, module, phase, config):
+    """Write keys deleted since the reference phase next to the Yardi files"""
+    output_dir = f"data/yardi_etl/{phase}"
+    filename = f"tombstones_{module}_{datetime.now().strftime('%Y%m%d')}.csv"
+    filepath = os.path.join(output_dir, filename)
+    
+    if deleted_df.empty:
+        # An earlier run today may have left deletions that no longer apply
+        if os.path.exists(filepath):
+            os.remove(filepath)
+            print(f"  Removed stale {filename} (no deletions this run)")
+        return None
+    
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Same Yardi format as the import files, keyed by Yardi field names
+    tombstones = deleted_df.rename(columns=config["field_mappings"].get(module, {}))
+    tombstones["Action"] = "DELETE"
+    tombstones.to_csv(filepath, sep="|", index=False, encoding="utf-16")
+    return filepath
\ No newline at end of file
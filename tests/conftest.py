@@ -0,0 +1,78 @@
+import os
+import copy
+import pytest
+from src.report_writer import flush_reports
+
+# Stages read and write phase-relative paths (data/sources/<phase>/...), so
+# every test runs inside its own temporary working directory.
+
+LEASING_CONFIG = {
+    "phase": "dm2_uat",
+    "modules": ["leasing"],
+    "field_mappings": {
+        "leasing": {
+            "property_id": "PropertyID",
+            "lease_ref": "LeaseReference",
+            "tenant_id": "TenantID",
+            "lease_start": "LeaseCommencementDate",
+            "lease_end": "LeaseExpirationDate",
+            "base_rent": "BaseRent",
+            "rent_freq": "RentFrequency",
+            "security_deposit": "SecurityDeposit",
+            "unit_number": "UnitNumber",
+        },
+    },
+    "transforms": {
+        "leasing": [
+            {"op": "default_id", "field": "TenantID", "from": "LeaseReference", "prefix": "TEMP-"},
+            {"op": "date", "fields": ["LeaseCommencementDate", "LeaseExpirationDate"],
+             "input_format": "%Y-%m-%d", "output_format": "%Y%m%d"},
+            {"op": "value_map", "field": "RentFrequency"},
+            {"op": "numeric", "fields": ["BaseRent"], "abs": True},
+        ],
+    },
+    "validation_rules": {
+        "leasing": {
+            "required": ["PropertyID", "LeaseReference", "TenantID", "LeaseCommencementDate", "BaseRent"],
+            "positive_values": ["BaseRent", "SecurityDeposit"],
+            "value_maps": {"RentFrequency": {"Monthly": "M", "Quarterly": "Q"}},
+        },
+    },
+    "delta_settings": {
+        "reference_phase": "dm1_crp",
+        "key_columns": {"leasing": "lease_ref"},
+        "duplicate_policy": "first",
+    },
+    "performance": {"max_workers": 1, "staging": {"mode": "never"}},
+}
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run the test inside an empty working directory"""
+    monkeypatch.chdir(tmp_path)
+    yield tmp_path
+    flush_reports()  # Queued reports are written relative to the working directory
+
+
+@pytest.fixture
+def make_config():
+    """Leasing config with overrides for keys, duplicate policy and staging"""
+    def build(key_columns="lease_ref", policy="first", engine=None):
+        config = copy.deepcopy(LEASING_CONFIG)
+        config["delta_settings"]["key_columns"]["leasing"] = key_columns
+        config["delta_settings"]["duplicate_policy"] = policy
+        if engine is not None:
+            config["performance"]["staging"] = {"mode": "always", "engine": engine}
+        return config
+    return build
+
+
+@pytest.fixture
+def write_source(workdir):
+    """Write a phase's source CSV for a module"""
+    def write(phase, module, text):
+        os.makedirs(f"data/sources/{phase}", exist_ok=True)
+        with open(f"data/sources/{phase}/{module}.csv", "w") as f:
+            f.write(text)
+    return write
@@ -0,0 +1,62 @@
+import pandas as pd
+from src.canonical import NULL_TOKEN, NUMERIC, canonical_hashes, canonical_values, column_kinds, hash_columns
+from src.delta_processor import get_delta_changes
+from src.migration_plan import get_module_plan
+from src.utils import build_key_index, hash_keys
+
+
+def test_numeric_fields_hash_equal_across_formats():
+    text = pd.DataFrame({"BaseRent": ["5000.00", " 4200.5 "]})
+    numbers = pd.DataFrame({"BaseRent": [5000, 4200.5]})
+    kinds = {"BaseRent": NUMERIC}
+    assert (canonical_hashes(text, kinds) == canonical_hashes(numbers, kinds)).all()
+
+
+def test_text_fields_keep_their_digits():
+    # Without a numeric kind, "5000.00" and "5000" are different text
+    left = canonical_values(pd.Series(["5000.00", "0012"]))
+    right = canonical_values(pd.Series(["5000", "12"]))
+    assert (left != right).all()
+
+
+def test_keys_are_not_normalized_as_numbers():
+    df = pd.DataFrame({"lease_ref": ["0012", "12", "12.0", "1e1", "10"]})
+    assert hash_keys(df, ["lease_ref"]).nunique() == 5
+    assert len(build_key_index(df, ["lease_ref"], "error")) == 5
+
+
+def test_nulls_and_whitespace_are_normalized():
+    values = canonical_values(pd.Series(["  a ", None, "", "nan", " NULL ", float("nan")], dtype=object))
+    assert values.tolist() == ["a"] + [NULL_TOKEN] * 5
+    assert hash_keys(pd.DataFrame({"k": [" L-1", "L-1 "]}), ["k"]).nunique() == 1
+
+
+def test_dates_in_different_formats_map_to_iso():
+    source = canonical_values(pd.Series(["2023-01-15", "2023-02-28"]), ("date", "%Y-%m-%d"))
+    yardi = canonical_values(pd.Series(["20230115", "20230228"]), ("date", "%Y%m%d"))
+    assert source.tolist() == yardi.tolist() == ["2023-01-15", "2023-02-28"]
+
+
+def test_column_kinds_follow_the_plan(make_config):
+    plan = get_module_plan(make_config(), "leasing")
+    assert column_kinds(plan) == {
+        "base_rent": NUMERIC,
+        "security_deposit": NUMERIC,
+        "lease_start": ("date", "%Y-%m-%d"),
+        "lease_end": ("date", "%Y-%m-%d"),
+    }
+    assert column_kinds(plan, yardi=True)["LeaseCommencementDate"] == ("date", "%Y%m%d")
+
+
+def test_hash_columns_are_mapped_and_key_columns_only(make_config):
+    plan = get_module_plan(make_config(), "leasing")
+    columns = ["notes", "lease_ref", "base_rent", "loaded_at"]
+    assert hash_columns(plan, columns) == ["base_rent", "lease_ref"]
+
+
+def test_schema_drift_marks_all_common_keys_changed(make_config, write_source):
+    write_source("dm1_crp", "leasing", "lease_ref,base_rent\nL-1,100\nL-2,200\nL-3,300\n")
+    write_source("dm2_uat", "leasing", "lease_ref,base_rent,unit_number\nL-1,100,U1\nL-2,200,U2\nL-4,400,U4\n")
+    delta, deleted = get_delta_changes("leasing", make_config())
+    assert sorted(delta["lease_ref"]) == ["L-1", "L-2", "L-4"]
+    assert deleted["lease_ref"].tolist() == ["L-3"]
@@ -0,0 +1,161 @@
+import os
+import glob
+import pytest
+import pandas as pd
+from src.delta_processor import get_delta_changes
+from src.reconciliation import generate_reconciliation_report
+from src.staging import duckdb
+from src.transformation import transform_data
+
+# The in-memory path and both staging engines must agree on the same data:
+# same new/changed keys, deleted keys and reconciliation discrepancies.
+
+ENGINES = [
+    None,  # In memory
+    pytest.param("duckdb", marks=pytest.mark.skipif(duckdb is None, reason="duckdb not installed")),
+    "sqlite",
+]
+
+HEADER = "property_id,lease_ref,tenant_id,lease_start,lease_end,base_rent,rent_freq,security_deposit,unit_number,notes\n"
+
+REFERENCE = HEADER + (
+    "P1,L-001,T1,2023-01-15,2024-01-14,5000.00,Monthly,7500.00,U1,a\n"
+    "P1,L-002,T2,2023-02-01,2024-01-31,4200.00,Monthly,6300.00,U2,b\n"
+    "P1,L-003,T3,2023-03-01,2024-02-29,3000.00,Monthly,,U3,c\n"
+    "P2,L-004,T4,2023-04-01,2024-03-31,2500.00,Quarterly,3000.00,U4,d\n"
+    "P2,L-005,T5,2023-05-01,2024-04-30,100.00,Monthly,100.00,U5,e\n"
+    "P2,0012,T6,2023-06-01,2024-05-31,900.00,Monthly,900.00,U6,f\n"
+    "P4,L-100,T7,2023-07-01,2024-06-30,700.00,Monthly,700.00,U7,g\n"
+    "P5,L-100,T8,2023-07-01,2024-06-30,800.00,Monthly,800.00,U8,h\n"
+)
+
+CURRENT = HEADER + (
+    "P1,L-001,T1,2023-01-15,2024-01-14,5000,Monthly,7500,U1,notes are not mapped\n"  # Same values
+    "P1,L-002,T2,2023-02-01,2024-01-31,4300.00,Monthly,6300.00,U2,b\n"  # Changed rent
+    "P2,L-004, T4 ,2023-04-01,2024-03-31,2500.00,Quarterly,3000.00,U4,d\n"  # Whitespace only
+    "P2,L-005,T5,2023-05-01,2024-04-30,100.00,Monthly,100.00,U5,e\n"
+    "P2,L-005,T5,2023-05-01,2024-04-30,200.00,Monthly,100.00,U5,e\n"  # Duplicate key
+    "P3,L-006,,2023-08-01,2024-07-31,600.00,Monthly,600.00,U9,i\n"  # New, no tenant
+    "P2,12,T6,2023-06-01,2024-05-31,900.00,Monthly,900.00,U6,f\n"  # Not the same key as 0012
+    "P4,L-100,T7,2023-07-01,2024-06-30,700.00,Monthly,700.00,U7,g\n"
+    "P5,L-100,T8,2023-07-01,2024-06-30,850.00,Monthly,800.00,U8,h\n"
+)
+
+SINGLE_KEY = "lease_ref"
+COMPOSITE_KEY = ["property_id", "lease_ref"]
+
+# (key columns, duplicate policy) -> (new or changed keys, deleted keys)
+EXPECTED_DELTA = {
+    (SINGLE_KEY, "first"): ({"L-002", "L-006", "12"}, {"L-003", "0012"}),
+    (SINGLE_KEY, "last"): ({"L-002", "L-005", "L-006", "12", "L-100"}, {"L-003", "0012"}),
+    ("composite", "first"): (
+        {"P1|L-002", "P3|L-006", "P2|12", "P5|L-100"}, {"P1|L-003", "P2|0012"}
+    ),
+    ("composite", "last"): (
+        {"P1|L-002", "P2|L-005", "P3|L-006", "P2|12", "P5|L-100"}, {"P1|L-003", "P2|0012"}
+    ),
+}
+
+
+def key_set(df, key_cols):
+    if df.empty:
+        return set()
+    keys = df[key_cols[0]].astype(str).str.strip()
+    for col in key_cols[1:]:
+        keys = keys + "|" + df[col].astype(str).str.strip()
+    return set(keys)
+
+
+@pytest.fixture
+def sources(write_source):
+    write_source("dm1_crp", "leasing", REFERENCE)
+    write_source("dm2_uat", "leasing", CURRENT)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("policy", ["first", "last"])
+@pytest.mark.parametrize("key", ["single", "composite"])
+def test_delta_engines_agree(sources, make_config, engine, policy, key):
+    key_cols = COMPOSITE_KEY if key == "composite" else [SINGLE_KEY]
+    config = make_config(COMPOSITE_KEY if key == "composite" else SINGLE_KEY, policy, engine)
+    delta, deleted = get_delta_changes("leasing", config)
+
+    expected_delta, expected_deleted = EXPECTED_DELTA[(SINGLE_KEY if key == "single" else key, policy)]
+    assert key_set(delta, key_cols) == expected_delta
+    assert len(delta) == len(expected_delta)
+    assert key_set(deleted, key_cols) == expected_deleted
+    assert list(deleted.columns) == key_cols
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_delta_error_policy_raises_on_duplicates(sources, make_config, engine):
+    with pytest.raises(ValueError, match="duplicate keys"):
+        get_delta_changes("leasing", make_config(SINGLE_KEY, "error", engine))
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_delta_schema_drift_marks_common_keys_changed(write_source, make_config, engine):
+    write_source("dm1_crp", "leasing", "lease_ref,base_rent\nL-1,100\nL-2,200\nL-3,300\n")
+    write_source("dm2_uat", "leasing", "lease_ref,base_rent,unit_number\nL-1,100,U1\nL-2,200,U2\nL-4,400,U4\n")
+    delta, deleted = get_delta_changes("leasing", make_config(engine=engine))
+    assert key_set(delta, [SINGLE_KEY]) == {"L-1", "L-2", "L-4"}
+    assert key_set(deleted, [SINGLE_KEY]) == {"L-3"}
+
+
+def write_yardi(df, name):
+    folder = "data/yardi_etl/dm2_uat/incremental"
+    os.makedirs(folder, exist_ok=True)
+    df.to_csv(os.path.join(folder, name), sep="|", index=False, encoding="utf-16")
+
+
+@pytest.fixture
+def yardi_loads(sources, make_config):
+    """An older load with a wrong rent, and a newer one that fixes it but has other problems"""
+    loaded = transform_data(pd.read_csv("data/sources/dm2_uat/leasing.csv"), "leasing", make_config())
+    loaded = loaded[loaded["LeaseReference"] != "L-006"].drop(columns=["notes"])  # Missing in Yardi
+
+    older = loaded.copy()
+    older.loc[older["LeaseReference"] == "L-002", "BaseRent"] = 1.0
+    write_yardi(older, "leasing_20250101.csv")
+
+    newer = loaded.copy()
+    newer.loc[newer["LeaseReference"] == "L-001", "LeaseCommencementDate"] = "20000101"
+    newer.loc[newer["LeaseReference"] == "L-004", "BaseRent"] = 2600.0
+    extra = newer.iloc[[0]].assign(LeaseReference="L-999")
+    write_yardi(pd.concat([newer, extra], ignore_index=True), "leasing_20250201.csv")
+
+
+def summary(report):
+    return {
+        "total_source": report["total_source"],
+        "total_yardi": report["total_yardi"],
+        "missing_in_yardi": set(report["missing_in_yardi"]),
+        "extra_in_yardi": set(report["extra_in_yardi"]),
+        "fields_compared": report["fields_compared"],
+        "field_discrepancies": [
+            (item["field"], item["mismatch_count"], [str(s["key"]) for s in item["sample"]])
+            for item in report["field_discrepancies"]
+        ],
+    }
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("newest_first", [False, True])
+def test_reconciliation_engines_agree(yardi_loads, make_config, monkeypatch, engine, newest_first):
+    # Directory listing order is arbitrary: the newest load must win either way
+    listing = glob.glob
+    monkeypatch.setattr(glob, "glob", lambda pattern: sorted(listing(pattern), reverse=newest_first))
+    report = generate_reconciliation_report("leasing", make_config(engine=engine))
+    assert report is not None
+    assert summary(report) == {
+        "total_source": 9,
+        "total_yardi": 17,
+        "missing_in_yardi": {"L-006"},
+        "extra_in_yardi": {"L-999"},
+        "fields_compared": ["PropertyID", "LeaseReference", "TenantID", "LeaseCommencementDate", "BaseRent"],
+        # Newest load per key: L-002 was fixed, L-001 and L-004 were not
+        "field_discrepancies": [
+            ("LeaseCommencementDate", 1, ["L-001"]),
+            ("BaseRent", 1, ["L-004"]),
+        ],
+    }